@@ -0,0 +1,141 @@
+"""
+eval/coalesce.py
+
+Duplicate and near-duplicate question coalescing for evaluation runs.
+
+Merged benchmark suites often repeat a question verbatim or with trivial edits.
+Tasks are grouped into equivalence classes: exact duplicates share the hash of
+their normalized text, and near-duplicates are found with MinHash signatures
+over word shingles, bucketed by LSH banding and confirmed by exact Jaccard
+similarity.  When gold answers are known, tasks are only merged if their
+normalized golds also match, so questions that differ in one key token ("in
+2019" vs "in 2021") stay separate.  The runner executes one rollout per class
+and fans its answer out to every member task.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence, Set
+import hashlib
+import random
+import re
+import unicodedata
+
+from eval.scoring import simple_normalize
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_question(text: str) -> str:
+    txt = unicodedata.normalize("NFKC", str(text or "")).lower()
+    txt = re.sub(r"[^\w\s]", " ", txt)
+    return re.sub(r"\s+", " ", txt).strip()
+
+
+def exact_key(text: str) -> str:
+    return hashlib.sha1(normalize_question(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """Word k-shingles of the normalized text (the whole text if it is shorter)."""
+    words = normalize_question(text).split()
+    if len(words) <= k:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures with ``num_perm`` universal hash functions."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, items: Set[str]) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in items]
+        return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._perms]
+
+
+class _UnionFind:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            # The earliest task stays the representative of its class
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+def coalesce_questions(
+    questions: Sequence[str],
+    near_dup_threshold: float | None = 0.9,
+    num_perm: int = 64,
+    bands: int = 16,
+    answers: Sequence[str] | None = None,
+) -> List[List[int]]:
+    """
+    Group question indices into equivalence classes.
+
+    Each class is sorted and its first index is the representative.  Pass
+    ``near_dup_threshold=None`` to merge exact duplicates only.  With
+    ``answers`` (normalized golds), only questions with equal answers merge.
+    """
+    uf = _UnionFind(len(questions))
+
+    by_key: Dict[str, int] = {}
+    for i, q in enumerate(questions):
+        key = exact_key(q) if answers is None else f"{exact_key(q)}:{answers[i]}"
+        if key in by_key:
+            uf.union(by_key[key], i)
+        else:
+            by_key[key] = i
+
+    if near_dup_threshold is not None and near_dup_threshold < 1.0:
+        reps = sorted(by_key.values())
+        shingle_sets = {i: shingles(questions[i]) for i in reps}
+        hasher = MinHasher(num_perm=num_perm)
+        rows = max(1, num_perm // bands)
+        buckets: Dict[tuple, List[int]] = {}
+        for i in reps:
+            sig = hasher.signature(shingle_sets[i])
+            for band in range(bands):
+                key = (band, tuple(sig[band * rows : (band + 1) * rows]))
+                buckets.setdefault(key, []).append(i)
+        checked: Set[tuple] = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pair = (members[x], members[y])
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    if answers is not None and answers[pair[0]] != answers[pair[1]]:
+                        continue
+                    if jaccard(shingle_sets[pair[0]], shingle_sets[pair[1]]) >= near_dup_threshold:
+                        uf.union(*pair)
+
+    classes: Dict[int, List[int]] = {}
+    for i in range(len(questions)):
+        classes.setdefault(uf.find(i), []).append(i)
+    return sorted(classes.values(), key=lambda c: c[0])
+
+
+def coalesce_tasks(tasks: Sequence[Dict[str, Any]], near_dup_threshold: float | None = 0.9) -> List[List[int]]:
+    """``coalesce_questions`` over eval tasks, merging only tasks whose normalized golds match."""
+    answers = None
+    if all("gold_norm" in t or "gold" in t for t in tasks):
+        answers = [t["gold_norm"] if "gold_norm" in t else simple_normalize(t["gold"]) for t in tasks]
+    return coalesce_questions([t["question"] for t in tasks], near_dup_threshold, answers=answers)
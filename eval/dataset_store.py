@@ -0,0 +1,279 @@
+"""
+eval/dataset_store.py
+
+Indexed binary store for BrowseComp-style task datasets.
+
+JSON/JSONL/CSV sources are parsed once at build time into a single file:
+
+  MAGIC | record_0 | record_1 | ... | offsets | meta | footer
+
+Each record is a UTF-8 JSON object holding the task id, the question, the gold
+answer and its precomputed normalized form.  Encrypted BrowseComp rows (those
+carrying a ``canary``) are decrypted during the build, rows are deduplicated by
+content hash, and ``offsets`` is a packed little-endian uint64 array of record
+boundaries.  ``meta`` maps task ids and the ``problem_topic`` / ``difficulty``
+values to record positions, so reading task k or a filtered subset only touches
+the bytes of the rows it returns.
+
+Usage example:
+  python eval/dataset_store.py \
+    --input data/browsecomp.jsonl data/realistic_browsecomp.jsonl \
+    --output data/browsecomp.store
+"""
+from __future__ import annotations
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+import argparse
+import base64
+import csv
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path so we can import eval.scoring when running directly
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from eval.scoring import simple_normalize
+
+MAGIC = b"BCSTORE1"
+_FOOTER = struct.Struct("<QQQQ8s")  # offsets_pos, count, meta_pos, meta_len, magic
+_OFFSET = struct.Struct("<Q")
+
+
+def _load_json(path: Path) -> List[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "data" in data and isinstance(data["data"], list):
+        data = data["data"]
+    if not isinstance(data, list):
+        raise ValueError("JSON file must contain a list of objects")
+    return data
+
+
+def _load_jsonl(path: Path) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rows.append(json.loads(line))
+    return rows
+
+
+def _load_csv(path: Path) -> List[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def load_rows(path: Path) -> List[Dict[str, Any]]:
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        return _load_jsonl(path)
+    if suffix == ".csv":
+        return _load_csv(path)
+    return _load_json(path)
+
+
+def _derive_key(password: str, length: int) -> bytes:
+    key = hashlib.sha256(password.encode()).digest()
+    return key * (length // len(key)) + key[: length % len(key)]
+
+
+def decrypt_field(ciphertext_b64: str, password: str) -> str:
+    """Decrypt a BrowseComp field (base64 XOR stream keyed by SHA-256 of the canary)."""
+    encrypted = base64.b64decode(ciphertext_b64)
+    key = _derive_key(password, len(encrypted))
+    return bytes(a ^ b for a, b in zip(encrypted, key)).decode("utf-8")
+
+
+def normalize_row(row: Dict[str, Any], index: int) -> Optional[Dict[str, Any]]:
+    """Map a raw dataset row to a store record, decrypting it if needed."""
+    canary = row.get("canary")
+    q = row.get("question") or row.get("problem") or row.get("prompt") or row.get("query")
+    a = row.get("answer") or row.get("gold") or row.get("reference")
+    if canary and q and a:
+        try:
+            q = decrypt_field(str(q), str(canary))
+            a = decrypt_field(str(a), str(canary))
+        except Exception:
+            return None
+    if not q or not a:
+        return None
+    q, a = str(q).strip(), str(a).strip()
+    return {
+        "id": row.get("id", index),
+        "question": q,
+        "gold": a,
+        "gold_norm": simple_normalize(a),
+        "problem_topic": row.get("problem_topic"),
+        "difficulty": row.get("difficulty"),
+        "hash": hashlib.sha1(f"{q}\x00{a}".encode("utf-8")).hexdigest(),
+    }
+
+
+def build_store(inputs: Iterable[str], output: str) -> Dict[str, int]:
+    """
+    Build a store file from one or more JSON/JSONL/CSV sources.
+
+    Returns counts of rows read, rows written and duplicates dropped.
+    """
+    out_path = Path(output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    seen: set[str] = set()
+    ids: List[Any] = []
+    id_strs: set[str] = set()
+    by_topic: Dict[str, List[int]] = {}
+    by_difficulty: Dict[str, List[int]] = {}
+    offsets: List[int] = []
+    n_read = n_dupes = 0
+
+    with out_path.open("wb") as f:
+        f.write(MAGIC)
+        for src in inputs:
+            for i, row in enumerate(load_rows(Path(src))):
+                n_read += 1
+                rec = normalize_row(row, i)
+                if rec is None:
+                    continue
+                if rec["hash"] in seen:
+                    n_dupes += 1
+                    continue
+                seen.add(rec["hash"])
+                pos = len(ids)
+                # Keep ids unique across merged sources; later files may restart at 0
+                if str(rec["id"]) in id_strs:
+                    base = f"{Path(src).stem}-{rec['id']}"
+                    candidate, n = base, 1
+                    while candidate in id_strs:
+                        n += 1
+                        candidate = f"{base}-{n}"
+                    rec["id"] = candidate
+                ids.append(rec["id"])
+                id_strs.add(str(rec["id"]))
+                if rec["problem_topic"]:
+                    by_topic.setdefault(str(rec["problem_topic"]), []).append(pos)
+                if rec["difficulty"]:
+                    by_difficulty.setdefault(str(rec["difficulty"]), []).append(pos)
+                offsets.append(f.tell())
+                f.write(json.dumps(rec, ensure_ascii=False).encode("utf-8"))
+        offsets.append(f.tell())
+
+        offsets_pos = f.tell()
+        f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        meta = json.dumps({"ids": ids, "by_topic": by_topic, "by_difficulty": by_difficulty}).encode("utf-8")
+        meta_pos = f.tell()
+        f.write(meta)
+        f.write(_FOOTER.pack(offsets_pos, len(ids), meta_pos, len(meta), MAGIC))
+
+    return {"read": n_read, "written": len(ids), "duplicates": n_dupes}
+
+
+class TaskStore:
+    """
+    Read-only view over a store file built by ``build_store``.
+
+    Records are memory-mapped and decoded on access; ``store[k]`` and
+    ``store.get(task_id)`` are O(1).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a task store: {self.path}")
+        offsets_pos, count, meta_pos, meta_len, magic = _FOOTER.unpack_from(self._mm, len(self._mm) - _FOOTER.size)
+        if magic != MAGIC:
+            raise ValueError(f"Corrupt task store footer: {self.path}")
+        self._offsets_pos = offsets_pos
+        self._count = count
+        meta = json.loads(self._mm[meta_pos : meta_pos + meta_len])
+        self._ids: List[Any] = meta["ids"]
+        self._by_topic: Dict[str, List[int]] = meta["by_topic"]
+        self._by_difficulty: Dict[str, List[int]] = meta["by_difficulty"]
+        self._pos_by_id = {str(tid): pos for pos, tid in enumerate(self._ids)}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, k: int) -> Dict[str, Any]:
+        if k < 0:
+            k += self._count
+        if not 0 <= k < self._count:
+            raise IndexError(k)
+        start = _OFFSET.unpack_from(self._mm, self._offsets_pos + k * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(self._mm, self._offsets_pos + (k + 1) * _OFFSET.size)[0]
+        return json.loads(self._mm[start:end])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for k in range(self._count):
+            yield self[k]
+
+    def get(self, task_id: Any) -> Optional[Dict[str, Any]]:
+        pos = self._pos_by_id.get(str(task_id))
+        return None if pos is None else self[pos]
+
+    @property
+    def topics(self) -> List[str]:
+        return sorted(self._by_topic)
+
+    @property
+    def difficulties(self) -> List[str]:
+        return sorted(self._by_difficulty)
+
+    def positions(self, problem_topic: str | None = None, difficulty: str | None = None) -> List[int]:
+        """Record positions matching the filters, resolved from the index alone."""
+        selected: Optional[List[int]] = None
+        if problem_topic is not None:
+            selected = self._by_topic.get(problem_topic, [])
+        if difficulty is not None:
+            matches = self._by_difficulty.get(difficulty, [])
+            selected = matches if selected is None else sorted(set(selected) & set(matches))
+        return list(range(self._count)) if selected is None else list(selected)
+
+    def select(
+        self,
+        problem_topic: str | None = None,
+        difficulty: str | None = None,
+        limit: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        positions = self.positions(problem_topic, difficulty)
+        if limit is not None:
+            positions = positions[:limit]
+        return [self[k] for k in positions]
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "TaskStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build an indexed BrowseComp task store")
+    parser.add_argument("--input", type=str, nargs="+", required=True, help="Source JSON, JSONL or CSV files")
+    parser.add_argument("--output", type=str, default="data/browsecomp.store", help="Output store path")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    counts = build_store(args.input, args.output)
+    print(
+        f"Wrote {counts['written']} tasks to {args.output} "
+        f"({counts['read']} rows read, {counts['duplicates']} duplicates dropped)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+eval/memory_profiler.py
+
+Memory profiling for long-running evaluation processes.
+
+``MemoryProfiler`` samples process RSS and ``tracemalloc`` snapshots between
+batches of tasks, attributes growth since the previous sample to allocation
+sites, and reports the top growers.  An optional RSS cap tells the runner when
+to release retained state (agent message lists, chat histories, browser
+workers) before continuing.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import gc
+import time
+import tracemalloc
+
+from strands_agent.rss import current_rss_bytes, rss_is_peak
+
+_MB = 1024 * 1024
+
+# Allocations made by the profiler itself are not interesting
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryProfiler:
+    """
+    Periodic RSS + tracemalloc sampler.
+
+    Args:
+        top_k: Number of allocation sites to report per sample.
+        rss_cap_mb: RSS above which ``over_cap`` returns True.
+        frames: Traceback depth recorded by tracemalloc.
+    """
+
+    def __init__(self, top_k: int = 10, rss_cap_mb: Optional[float] = None, frames: int = 1) -> None:
+        self.top_k = top_k
+        self.rss_cap_bytes = int(rss_cap_mb * _MB) if rss_cap_mb else None
+        self.frames = frames
+        self.samples: List[Dict[str, Any]] = []
+        self._last: Optional[tracemalloc.Snapshot] = None
+        self._start_rss = 0
+        self._start_time = 0.0
+        # Without psutil or /proc only the peak is available, which never goes down
+        self.rss_label = "peak RSS" if rss_is_peak() else "RSS"
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._start_rss = current_rss_bytes()
+        self._start_time = time.perf_counter()
+        self._last = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def sample(self, tasks_done: int) -> Dict[str, Any]:
+        """Take a sample, print a report and return it."""
+        if self._last is None:
+            self.start()
+        rss = current_rss_bytes()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        growth = snapshot.compare_to(self._last, "lineno")
+        self._last = snapshot
+        traced, peak = tracemalloc.get_traced_memory()
+        prev_rss = self.samples[-1]["rss_bytes"] if self.samples else self._start_rss
+
+        top = []
+        for stat in growth[: self.top_k]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            top.append(
+                {
+                    "site": f"{frame.filename}:{frame.lineno}",
+                    "size_diff_bytes": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size_bytes": stat.size,
+                }
+            )
+
+        report = {
+            "tasks_done": tasks_done,
+            "elapsed_s": time.perf_counter() - self._start_time,
+            "rss_bytes": rss,
+            "rss_is_peak": self.rss_label == "peak RSS",
+            "rss_delta_bytes": rss - prev_rss,
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "top_growth": top,
+        }
+        self.samples.append(report)
+        self._print(report)
+        return report
+
+    def _print(self, report: Dict[str, Any]) -> None:
+        print(
+            f"[MemoryProfiler] after {report['tasks_done']} tasks: "
+            f"{self.rss_label} {report['rss_bytes'] / _MB:.1f} MB ({report['rss_delta_bytes'] / _MB:+.1f} MB), "
+            f"traced {report['traced_bytes'] / _MB:.1f} MB (peak {report['traced_peak_bytes'] / _MB:.1f} MB)"
+        )
+        for entry in report["top_growth"]:
+            print(
+                f"  {entry['size_diff_bytes'] / 1024:+10.1f} KiB {entry['count_diff']:+8d} blocks  {entry['site']}"
+            )
+
+    def over_cap(self) -> bool:
+        return self.rss_cap_bytes is not None and current_rss_bytes() >= self.rss_cap_bytes
+
+    def collect(self) -> int:
+        """Run a full GC pass and return the RSS freed (may be zero; allocators keep pages)."""
+        before = current_rss_bytes()
+        gc.collect()
+        return before - current_rss_bytes()
+
+    def summary(self) -> None:
+        if not self.samples:
+            return
+        first, last = self.samples[0], self.samples[-1]
+        tasks = max(last["tasks_done"] - first["tasks_done"], 1)
+        slope = (last["rss_bytes"] - first["rss_bytes"]) / tasks
+        print(
+            f"[MemoryProfiler] {self.rss_label} {self._start_rss / _MB:.1f} MB -> {last['rss_bytes'] / _MB:.1f} MB "
+            f"over {last['tasks_done']} tasks (~{slope / 1024:.1f} KiB/task after first sample)"
+        )
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -1,12 +1,10 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any
 import os
 import sys
-import json
 import argparse
 import asyncio
 from pathlib import Path
-import re
 import types
 
 from dotenv import load_dotenv
@@ -24,6 +22,12 @@ except Exception:  # pragma: no cover
 from rllm.engine.agent_execution_engine import AsyncAgentExecutionEngine
 from rllm_workflow.strands_agent_wrapper import StrandsAgentWrapper
 from rllm_workflow.strands_env import StrandsEnv
+from eval.dataset_store import TaskStore, load_rows
+from eval.scoring import compute_accuracy, majority_vote, pass_at_k, simple_normalize
+from eval.memory_profiler import MemoryProfiler
+from eval.coalesce import coalesce_tasks
+from strands_agent.browser_pool import get_shared_pool
+from strands_agent.parallel_browser import get_shared_fetcher, get_shared_page_cache
 
 
 """
@@ -36,6 +40,8 @@ Usage example:
 
 DATA FORMAT: Each line (JSONL) or element (JSON array) should contain at least:
   {"id": int|str, "question": str, "answer": str}
+A prebuilt task store (see eval/dataset_store.py) with a .store suffix is also
+accepted and supports --topic/--difficulty filtering without reading other rows.
 
 Scoring: normalized exact match (case/punct/space insensitive; URL canonicalization).
 """
@@ -43,43 +49,66 @@ Scoring: normalized exact match (case/punct/space insensitive; URL canonicalizat
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Evaluate Strands+rLLM on BrowseComp")
-    parser.add_argument("--data", type=str, default=os.getenv("BROWSECOMP_PATH"), help="Path to BrowseComp JSON or JSONL")
+    parser.add_argument("--data", type=str, default=os.getenv("BROWSECOMP_PATH"), help="Path to BrowseComp JSON, JSONL or .store")
     parser.add_argument("--limit", type=int, default=None, help="Optional number of tasks to evaluate")
+    parser.add_argument("--topic", type=str, default=None, help="Only evaluate tasks with this problem_topic")
+    parser.add_argument("--difficulty", type=str, default=None, help="Only evaluate tasks with this difficulty")
     parser.add_argument("--max_steps", type=int, default=3, help="Max dialogue steps per task")
     parser.add_argument("--temperature", type=float, default=0.2, help="Sampling temperature")
-    parser.add_argument("--model", type=str, default="gpt-4o-mini", help="OpenAI model name to use via rLLM (not used when Strands responds)")
-    return parser.parse_args()
-
-
-def _load_json(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    if isinstance(data, dict) and "data" in data and isinstance(data["data"], list):
-        data = data["data"]
-    if not isinstance(data, list):
-        raise ValueError("JSON file must contain a list of objects")
-    return data
-
-
-def _load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
-    return rows
-
-
-def load_tasks(path_str: str, limit: int | None = None) -> List[Dict[str, Any]]:
+    parser.add_argument("--model", type=str, default=None, help="OpenAI model the Strands agent runs on (default: STRANDS_MODEL_CASCADE or gpt-4o-mini; ignored when --cascade is given)")
+    parser.add_argument("--cascade", type=str, default=None, help="Comma-separated models from cheapest to strongest, e.g. gpt-4o-mini,gpt-4o")
+    parser.add_argument("--max-cycles", type=int, default=None, help="Model calls one cascade attempt may make before escalating (default: STRANDS_MAX_CYCLES or unlimited)")
+    parser.add_argument("--task-cost-budget", type=float, default=None, help="Per-task USD budget; no escalation once spent")
+    parser.add_argument("--max-prompt-length", type=int, default=None, help="Strands prompt token budget (default: STRANDS_MAX_PROMPT_LENGTH or unlimited)")
+    parser.add_argument("--stream", action="store_true", help="Stream Strands responses, record time-to-first-token and cut off at max response length")
+    parser.add_argument("--stop-marker", type=str, action="append", default=None, help="Cancel a streamed response once this marker appears (repeatable)")
+    parser.add_argument("--samples-per-task", type=int, default=1, help="Rollouts per question; reports pass@1, pass@k and majority-vote accuracy when > 1")
+    parser.add_argument("--no-coalesce", action="store_true", help="Run every task even if it duplicates another (for variance studies)")
+    parser.add_argument("--near-dup-threshold", type=float, default=0.9, help="Word-shingle Jaccard similarity at which questions are coalesced; >=1 merges exact duplicates only")
+    parser.add_argument("--profile-memory", action="store_true", help="Sample RSS and tracemalloc between task batches and report top allocation sites")
+    parser.add_argument("--profile-every", type=int, default=10, help="Tasks per batch between memory samples")
+    parser.add_argument("--profile-top", type=int, default=10, help="Allocation sites reported per sample")
+    parser.add_argument("--rss-cap-mb", type=float, default=None, help="With --profile-memory, release agent state and restart browser workers above this RSS")
+    parser.add_argument("--task-latency-budget", type=float, default=None, help="Per-task seconds budget; no escalation once used")
+    args = parser.parse_args()
+    if args.max_cycles is not None and args.max_cycles < 1:
+        parser.error("--max-cycles must be at least 1")
+    if args.max_prompt_length is not None and args.max_prompt_length < 1:
+        parser.error("--max-prompt-length must be at least 1")
+    if args.samples_per_task < 1:
+        parser.error("--samples-per-task must be at least 1")
+    if args.profile_every < 1:
+        parser.error("--profile-every must be at least 1")
+    if args.profile_top < 1:
+        parser.error("--profile-top must be at least 1")
+    return args
+
+
+def load_tasks(
+    path_str: str,
+    limit: int | None = None,
+    problem_topic: str | None = None,
+    difficulty: str | None = None,
+) -> List[Dict[str, Any]]:
     path = Path(path_str)
     if not path.exists():
         raise FileNotFoundError(f"Data file not found: {path}")
-    data = _load_jsonl(path) if path.suffix.lower() == ".jsonl" else _load_json(path)
 
     tasks: List[Dict[str, Any]] = []
+    if path.suffix.lower() == ".store":
+        with TaskStore(str(path)) as store:
+            for rec in store.select(problem_topic, difficulty, limit):
+                tasks.append({"id": rec["id"], "question": rec["question"], "gold": rec["gold"], "gold_norm": rec["gold_norm"]})
+        if not tasks:
+            raise ValueError("No valid tasks loaded from dataset")
+        return tasks
+
+    data = load_rows(path)
     for i, row in enumerate(data):
+        if problem_topic is not None and row.get("problem_topic") != problem_topic:
+            continue
+        if difficulty is not None and row.get("difficulty") != difficulty:
+            continue
         q = row.get("question") or row.get("prompt") or row.get("query")
         a = row.get("answer") or row.get("gold") or row.get("reference")
         tid = row.get("id", i)
@@ -93,44 +122,49 @@ def load_tasks(path_str: str, limit: int | None = None) -> List[Dict[str, Any]]:
     return tasks
 
 
-def _strip_url(url: str) -> str:
-    url = url.strip()
-    if (url.startswith("\"") and url.endswith("\"")) or (url.startswith("'") and url.endswith("'")):
-        url = url[1:-1]
-    url = url.strip()
-    url = re.sub(r"^https?://", "", url, flags=re.IGNORECASE)
-    parts = url.split("/", 1)
-    parts[0] = parts[0].lower()
-    url = "/".join(parts)
-    url = url[:-1] if url.endswith("/") else url
-    return url
-
-
-def simple_normalize(text: str) -> str:
-    if text is None:
-        return ""
-    txt = str(text).strip()
-    if re.match(r"^https?://", txt, flags=re.IGNORECASE) or "." in txt:
-        return _strip_url(txt)
-    txt = txt.lower()
-    if (txt.startswith("\"") and txt.endswith("\"")) or (txt.startswith("'") and txt.endswith("'")):
-        txt = txt[1:-1]
-    txt = re.sub(r"[\s\.,;:!?\-—'\"\(\)\[\]\{\}]+", " ", txt)
-    txt = re.sub(r"\s+", " ", txt).strip()
-    return txt
-
-
-def compute_accuracy(predictions: List[str], golds: List[str]) -> Tuple[float, int, int]:
-    correct = 0
-    for pred, gold in zip(predictions, golds):
-        if simple_normalize(pred) == simple_normalize(gold):
-            correct += 1
-    total = len(golds)
-    acc = (correct / total) if total else 0.0
-    return acc, correct, total
-
-
-async def run_eval(data_path: str, limit: int | None, max_steps: int, model: str, temperature: float) -> None:
+def _final_response(res: Any) -> str:
+    if getattr(res, "steps", None):
+        for step in reversed(res.steps):
+            if hasattr(step, "model_response") and step.model_response:
+                return step.model_response
+    return getattr(res, "action", None) or ""
+
+
+def _release_memory(engine: Any) -> None:
+    """Clear state the engine's agents retain across tasks and restart every browser."""
+    for agent in getattr(engine, "agents", None) or []:
+        if hasattr(agent, "release_memory"):
+            # Also shuts down the agent's interactive Chromium
+            agent.release_memory()
+    get_shared_fetcher().recycle()
+    pool = get_shared_pool()
+    if pool is not None:
+        pool.recycle_all()
+
+
+async def run_eval(
+    data_path: str,
+    limit: int | None,
+    max_steps: int,
+    model: str | None,
+    temperature: float,
+    problem_topic: str | None = None,
+    difficulty: str | None = None,
+    cascade: List[str] | None = None,
+    task_cost_budget: float | None = None,
+    task_latency_budget: float | None = None,
+    max_cycles: int | None = None,
+    max_prompt_length: int | None = None,
+    stream: bool = False,
+    stop_markers: List[str] | None = None,
+    profile_memory: bool = False,
+    profile_every: int = 10,
+    profile_top: int = 10,
+    rss_cap_mb: float | None = None,
+    coalesce: bool = True,
+    near_dup_threshold: float | None = 0.9,
+    samples_per_task: int = 1,
+) -> None:
     load_dotenv()
 
     api_key = os.getenv("OPENAI_API_KEY")
@@ -144,21 +178,54 @@ async def run_eval(data_path: str, limit: int | None, max_steps: int, model: str
         except Exception:
             tokenizer = None
 
+    tasks = load_tasks(data_path, limit=limit, problem_topic=problem_topic, difficulty=difficulty)
+    if coalesce:
+        classes = coalesce_tasks(tasks, near_dup_threshold)
+    else:
+        classes = [[i] for i in range(len(tasks))]
+    if len(classes) < len(tasks):
+        print(f"Coalesced {len(tasks)} tasks into {len(classes)} rollouts (duplicates reuse their class result)")
+        for c in classes:
+            if len(c) > 1:
+                print(f"  merged task ids: {', '.join(str(tasks[i]['id']) for i in c)}")
+    # The k samples of a question are adjacent and byte-identical, so they share
+    # the system/user prompt prefix (provider prompt caching) and the page cache
+    exec_tasks = [
+        {"id": tasks[c[0]]["id"], "question": tasks[c[0]]["question"], "max_steps": max_steps, "sample": j}
+        for c in classes
+        for j in range(samples_per_task)
+    ]
+
     engine_config = {
         "agent_class": StrandsAgentWrapper,
         "env_class": StrandsEnv,
-        "agent_args": {},
+        # None leaves the STRANDS_* env vars in charge of settings not given on the command line
+        "agent_args": {
+            "max_prompt_length": max_prompt_length,
+            "models": cascade or ([model] if model else None),
+            "task_cost_budget": task_cost_budget,
+            "task_latency_budget": task_latency_budget,
+            "max_cycles": max_cycles,
+            "stream": True if stream else None,
+            "max_response_length": 500,
+            "stop_markers": stop_markers,
+            "temperature": temperature if samples_per_task > 1 else None,
+            "share_page_cache": True if samples_per_task > 1 else None,
+        },
         "env_args": {},
         "engine_name": "openai",
         "tokenizer": tokenizer,
         "sampling_params": {
-            "model": model,
+            "model": model or "gpt-4o-mini",
             "temperature": temperature,
         },
         "rollout_engine_args": {
             "api_key": api_key,
         },
-        "n_parallel_agents": 1,
+        # One agent per sample so each rollout keeps its own trajectory.  update_from_model
+        # makes a blocking Strands call on the engine loop, so the k rollouts of a question
+        # run one after another; later samples hit the page cache the first one filled.
+        "n_parallel_agents": samples_per_task,
         "max_steps": max_steps,
         "max_response_length": 500,
         "max_prompt_length": 2000,
@@ -172,31 +239,76 @@ async def run_eval(data_path: str, limit: int | None, max_steps: int, model: str
     engine.get_model_response = types.MethodType(_noop, engine)  # type: ignore
     engine._get_openai_async = types.MethodType(_noop, engine)  # type: ignore
 
-    tasks = load_tasks(data_path, limit=limit)
-    exec_tasks = [{"id": t["id"], "question": t["question"], "max_steps": max_steps} for t in tasks]
-
-    results = await engine.execute_tasks(exec_tasks)
-
-    preds: List[str] = []
-    golds: List[str] = []
-
-    for task, res in zip(tasks, results):
-        final_response = None
-        if getattr(res, "steps", None):
-            for step in reversed(res.steps):
-                if hasattr(step, "model_response") and step.model_response:
-                    final_response = step.model_response
-                    break
-        if final_response is None:
-            final_response = getattr(res, "action", None) or ""
-
-        preds.append(str(final_response))
-        golds.append(task["gold"])
-
-    acc, num_correct, num_total = compute_accuracy(preds, golds)
+    profiler = MemoryProfiler(top_k=profile_top, rss_cap_mb=rss_cap_mb) if profile_memory else None
+    if profiler is not None:
+        profiler.start()
+    # Profiling runs tasks in batches so memory can be sampled between them
+    batch_size = profile_every * samples_per_task if profiler is not None else len(exec_tasks)
+
+    rollout_preds: List[str] = []
+    golds: List[str] = [t["gold"] for t in tasks]
+    calls_by_model: Dict[str, int] = {}
+    total_cost = 0.0
+    ttfts: List[float] = []
+    n_cutoffs = 0
+
+    for start in range(0, len(exec_tasks), batch_size):
+        results = await engine.execute_tasks(exec_tasks[start : start + batch_size])
+        for res in results:
+            rollout_preds.append(str(_final_response(res)))
+            for step in getattr(res, "steps", None) or []:
+                for attempt in (getattr(step, "info", None) or {}).get("routing") or []:
+                    calls_by_model[attempt["model"]] = calls_by_model.get(attempt["model"], 0) + 1
+                    total_cost += attempt["cost_usd"]
+                stream_info = (getattr(step, "info", None) or {}).get("stream")
+                if stream_info:
+                    if stream_info["ttft_s"] is not None:
+                        ttfts.append(stream_info["ttft_s"])
+                    n_cutoffs += 1 if stream_info["cutoff"] else 0
+        # Drop trajectories as soon as their predictions are extracted
+        del results
+
+        if profiler is not None:
+            profiler.sample(len(rollout_preds))
+            if profiler.over_cap():
+                _release_memory(engine)
+                freed = profiler.collect()
+                print(f"[MemoryProfiler] RSS cap hit: released agent state and restarted browsers ({freed / 2**20:.1f} MB freed)")
+
+    if profiler is not None:
+        profiler.summary()
+        profiler.stop()
+
+    # Fan each class's answer(s) back out to all of its member tasks
+    samples: List[List[str]] = [[] for _ in tasks]
+    for ci, members in enumerate(classes):
+        class_samples = rollout_preds[ci * samples_per_task : (ci + 1) * samples_per_task]
+        for i in members:
+            samples[i] = class_samples
+    preds: List[str] = [s[0] if len(s) == 1 else majority_vote(s) for s in samples]
+
+    gold_norms = [t["gold_norm"] for t in tasks] if all("gold_norm" in t for t in tasks) else None
+    acc, num_correct, num_total = compute_accuracy(preds, golds, gold_norms)
 
     print("BrowseComp results:")
-    print(f"Accuracy: {acc:.4f} ({num_correct}/{num_total})")
+    if samples_per_task == 1:
+        print(f"Accuracy: {acc:.4f} ({num_correct}/{num_total})")
+    else:
+        norms = gold_norms or [simple_normalize(g) for g in golds]
+        n_correct = [sum(simple_normalize(p) == g for p in s) for s, g in zip(samples, norms)]
+        k = samples_per_task
+        pass1 = sum(pass_at_k(k, c, 1) for c in n_correct) / num_total
+        passk = sum(pass_at_k(k, c, k) for c in n_correct) / num_total
+        print(f"pass@1: {pass1:.4f}  pass@{k}: {passk:.4f}")
+        print(f"Majority-vote accuracy: {acc:.4f} ({num_correct}/{num_total})")
+        cache = get_shared_page_cache()
+        print(f"Shared page cache: {cache.hits} hits, {cache.misses} misses")
+    if calls_by_model:
+        served = ", ".join(f"{m}={n}" for m, n in calls_by_model.items())
+        print(f"Model calls: {served}; estimated cost: ${total_cost:.4f}")
+    if ttfts:
+        ttfts.sort()
+        print(f"Time to first token: median {ttfts[len(ttfts) // 2]:.2f}s; early cutoffs: {n_cutoffs}")
 
     for t, p in list(zip(tasks, preds))[:5]:
         print(f"- id={t['id']}\n  Q: {t['question'][:200]}\n  Pred: {p[:200]}\n  Gold: {t['gold']}")
@@ -207,7 +319,32 @@ def main() -> None:
     if not args.data:
         print("--data is required or set BROWSECOMP_PATH env var", file=sys.stderr)
         sys.exit(2)
-    asyncio.run(run_eval(args.data, args.limit, args.max_steps, args.model, args.temperature))
+    cascade = [m.strip() for m in args.cascade.split(",") if m.strip()] if args.cascade else None
+    asyncio.run(
+        run_eval(
+            args.data,
+            args.limit,
+            args.max_steps,
+            args.model,
+            args.temperature,
+            problem_topic=args.topic,
+            difficulty=args.difficulty,
+            cascade=cascade,
+            task_cost_budget=args.task_cost_budget,
+            task_latency_budget=args.task_latency_budget,
+            max_cycles=args.max_cycles,
+            max_prompt_length=args.max_prompt_length,
+            stream=args.stream,
+            stop_markers=args.stop_marker,
+            profile_memory=args.profile_memory,
+            profile_every=args.profile_every,
+            profile_top=args.profile_top,
+            rss_cap_mb=args.rss_cap_mb,
+            coalesce=not args.no_coalesce,
+            near_dup_threshold=args.near_dup_threshold,
+            samples_per_task=args.samples_per_task,
+        )
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+"""
+eval/scoring.py
+
+Answer normalization and accuracy metrics shared by the evaluation runners and
+the dataset store.
+"""
+from __future__ import annotations
+from typing import List, Sequence, Tuple
+from collections import Counter
+import math
+import re
+
+
+def _strip_url(url: str) -> str:
+    url = url.strip()
+    if (url.startswith("\"") and url.endswith("\"")) or (url.startswith("'") and url.endswith("'")):
+        url = url[1:-1]
+    url = url.strip()
+    url = re.sub(r"^https?://", "", url, flags=re.IGNORECASE)
+    parts = url.split("/", 1)
+    parts[0] = parts[0].lower()
+    url = "/".join(parts)
+    url = url[:-1] if url.endswith("/") else url
+    return url
+
+
+def simple_normalize(text: str) -> str:
+    if text is None:
+        return ""
+    txt = str(text).strip()
+    if re.match(r"^https?://", txt, flags=re.IGNORECASE) or "." in txt:
+        return _strip_url(txt)
+    txt = txt.lower()
+    if (txt.startswith("\"") and txt.endswith("\"")) or (txt.startswith("'") and txt.endswith("'")):
+        txt = txt[1:-1]
+    txt = re.sub(r"[\s\.,;:!?\-—'\"\(\)\[\]\{\}]+", " ", txt)
+    txt = re.sub(r"\s+", " ", txt).strip()
+    return txt
+
+
+def compute_accuracy(
+    predictions: List[str],
+    golds: List[str],
+    normalized_golds: List[str] | None = None,
+) -> Tuple[float, int, int]:
+    if normalized_golds is None:
+        normalized_golds = [simple_normalize(gold) for gold in golds]
+    correct = 0
+    for pred, gold_norm in zip(predictions, normalized_golds):
+        if simple_normalize(pred) == gold_norm:
+            correct += 1
+    total = len(golds)
+    acc = (correct / total) if total else 0.0
+    return acc, correct, total
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Unbiased pass@k estimate from ``n`` samples of which ``c`` are correct."""
+    if n - c < k:
+        return 1.0
+    return 1.0 - math.comb(n - c, k) / math.comb(n, k)
+
+
+def majority_vote(predictions: Sequence[str]) -> str:
+    """Most common prediction by normalized form; ties go to the earliest sample."""
+    if not predictions:
+        return ""
+    norms = [simple_normalize(p) for p in predictions]
+    counts = Counter(n for n in norms if n)
+    if not counts:
+        return predictions[0]
+    best = max(counts.values())
+    for pred, norm in zip(predictions, norms):
+        if norm and counts[norm] == best:
+            return pred
+    return predictions[0]
@@ -103,6 +103,8 @@ def main():
                        help="Output JSONL file path")
     parser.add_argument("--limit", type=int, default=None,
                        help="Limit number of tasks to create")
+    parser.add_argument("--store", type=str, default=None,
+                       help="Also build an indexed task store at this path (see eval/dataset_store.py)")
     
     args = parser.parse_args()
     
@@ -119,6 +121,12 @@ def main():
     
     # Save to JSONL
     save_to_jsonl(all_tasks, args.output)
+
+    # Optionally build the indexed store for fast filtered loading
+    if args.store:
+        from eval.dataset_store import build_store
+        counts = build_store([args.output], args.store)
+        print(f"Built task store with {counts['written']} tasks at {args.store}")
     
     # Print sample
     print("\nSample tasks:")
@@ -0,0 +1,176 @@
+"""
+rllm_workflow/prompt_budget.py
+
+Prompt token budget for the Strands agent's message list.
+
+``MessageTokenCounter`` tokenizes each message of ``agent.messages`` once with
+the local tokenizer and caches the count, so the prompt length can be checked
+before every model call without re-tokenizing the whole conversation.
+``enforce_message_budget`` applies the overflow policy to that list.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Optional
+
+OVERFLOW_POLICIES = ("truncate", "error", "warn")
+
+# Approximate chat template overhead per message (role header and end marker)
+PER_MESSAGE_OVERHEAD = 4
+
+ELIDED_TOOL_RESULT = "(tool output removed to fit the prompt budget)"
+
+
+class PromptLengthExceeded(ValueError):
+    """Raised when the prompt exceeds its token budget under the ``error`` policy."""
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(path: str = "./local_tokenizer") -> Any:
+    """Load (once per process) the local tokenizer, or return None if unavailable."""
+    try:
+        from transformers import AutoTokenizer  # type: ignore
+
+        return AutoTokenizer.from_pretrained(path)
+    except Exception:
+        return None
+
+
+def count_tokens(text: Any, tokenizer: Any = None) -> int:
+    """Token count of ``text``; falls back to a ~4 chars/token estimate without a tokenizer."""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    if tokenizer is not None:
+        try:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        except Exception:
+            pass
+    return (len(text) + 3) // 4
+
+
+def strands_message_text(message: Any) -> str:
+    """Flatten a Strands message (text, toolUse and toolResult blocks) into countable text."""
+    if not isinstance(message, dict):
+        return str(message)
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        if not isinstance(block, dict):
+            parts.append(str(block))
+        elif "text" in block:
+            parts.append(str(block["text"]))
+        elif "toolUse" in block:
+            tool_use = block["toolUse"] or {}
+            parts.append(f"{tool_use.get('name', '')} {json.dumps(tool_use.get('input', {}), default=str)}")
+        elif "toolResult" in block:
+            parts.append(strands_message_text({"content": (block["toolResult"] or {}).get("content")}))
+        else:
+            parts.append(json.dumps(block, default=str))
+    return "\n".join(parts)
+
+
+class MessageTokenCounter:
+    """
+    Token counts for the Strands agent's ``messages`` list, cached per message.
+
+    Strands and its conversation manager own that list and may trim it, so
+    counts are keyed by message identity: each message is tokenized the first
+    time it is seen and later totals only sum cached counts.
+    """
+
+    def __init__(self, tokenizer: Any = None, per_message_overhead: int = PER_MESSAGE_OVERHEAD) -> None:
+        self.tokenizer = tokenizer
+        self.per_message_overhead = per_message_overhead
+        # id(message) -> (message, count); holding the message keeps its id from being reused
+        self._cache: dict[int, tuple[Any, int]] = {}
+
+    def count(self, message: Any) -> int:
+        entry = self._cache.get(id(message))
+        if entry is None or entry[0] is not message:
+            entry = (message, count_tokens(strands_message_text(message), self.tokenizer) + self.per_message_overhead)
+            self._cache[id(message)] = entry
+        return entry[1]
+
+    def total(self, messages: list) -> int:
+        total = sum(self.count(m) for m in messages)
+        if len(self._cache) > 2 * len(messages) + 16:
+            live = {id(m) for m in messages}
+            self._cache = {k: v for k, v in self._cache.items() if k in live}
+        return total
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def _is_turn_start(message: Any) -> bool:
+    # A conversation may only resume at a user message that is not a tool result
+    if not isinstance(message, dict) or message.get("role") != "user":
+        return False
+    content = message.get("content")
+    return not any(isinstance(b, dict) and "toolResult" in b for b in (content or []) if not isinstance(content, str))
+
+
+def _elide_tool_results(message: Any) -> Any:
+    # Keep toolUseId/status so the pairing with the toolUse block stays valid
+    content = message.get("content") if isinstance(message, dict) else None
+    if isinstance(content, str) or not content:
+        return message
+    blocks, changed = [], False
+    for block in content:
+        result = block.get("toolResult") if isinstance(block, dict) else None
+        if result is not None and result.get("content") != [{"text": ELIDED_TOOL_RESULT}]:
+            block = {"toolResult": {**result, "content": [{"text": ELIDED_TOOL_RESULT}]}}
+            changed = True
+        blocks.append(block)
+    return {**message, "content": blocks} if changed else message
+
+
+def enforce_message_budget(
+    messages: list,
+    counter: MessageTokenCounter,
+    max_tokens: Optional[int],
+    policy: str = "truncate",
+    extra_tokens: int = 0,
+) -> tuple[int, int]:
+    """
+    Apply ``policy`` to a Strands message list in place.
+
+    ``extra_tokens`` covers what is sent besides the messages (system prompt
+    and tool specs).  ``truncate`` first drops whole turns older than the
+    current one, resuming at a plain user message so tool use/result pairs
+    stay intact, then replaces the oldest tool results of the current turn
+    with a short placeholder.  Returns ``(prompt_tokens, messages_trimmed)``.
+    """
+    total = counter.total(messages) + extra_tokens
+    if max_tokens is None or total <= max_tokens:
+        return total, 0
+    if policy == "error":
+        raise PromptLengthExceeded(f"Prompt is {total} tokens, limit is {max_tokens}")
+    if policy == "warn":
+        print(f"[PromptBudget] Prompt is {total} tokens, limit is {max_tokens}")
+        return total, 0
+
+    trimmed = 0
+    current = max((i for i, m in enumerate(messages) if _is_turn_start(m)), default=0)
+    while current > 0 and total > max_tokens:
+        total -= counter.count(messages.pop(0))
+        trimmed += 1
+        current -= 1
+        while current > 0 and not _is_turn_start(messages[0]):
+            total -= counter.count(messages.pop(0))
+            trimmed += 1
+            current -= 1
+    for i, message in enumerate(messages):
+        if total <= max_tokens:
+            break
+        elided = _elide_tool_results(message)
+        if elided is message:
+            continue
+        total += counter.count(elided) - counter.count(message)
+        messages[i] = elided
+        trimmed += 1
+    if total > max_tokens:
+        print(f"[PromptBudget] Current turn alone is {total} tokens, limit is {max_tokens}")
+    return total, trimmed
@@ -1,19 +1,138 @@
 from rllm.agents.agent import BaseAgent, Trajectory, Step, Action
-from strands_agent.agent import build_agent
+from strands.hooks import BeforeModelCallEvent, HookProvider, HookRegistry
+from strands_tools.browser import LocalChromiumBrowser
+from strands_agent.agent import build_agent, close_browser
+from strands_agent.routing import ModelCascade
+from rllm_workflow.prompt_budget import (
+    OVERFLOW_POLICIES,
+    PER_MESSAGE_OVERHEAD,
+    MessageTokenCounter,
+    PromptLengthExceeded,
+    count_tokens,
+    enforce_message_budget,
+    load_tokenizer,
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
 import os
+import time
+import weakref
 try:
     from strands_agent.memory import Mem1Memory  # Optional MEM1 backend
 except Exception:
     Mem1Memory = None  # type: ignore
 
+class _ModelCallGuard(HookProvider):
+    """
+    Runs before every model call of the Strands event loop: applies the prompt
+    budget to ``agent.messages`` and cancels calls past the per-attempt cycle budget.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int | None, policy: str, max_cycles: int | None = None):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.policy = policy
+        self.max_cycles = max_cycles
+        self.counter = MessageTokenCounter(tokenizer=tokenizer)
+        self._fixed_key = None
+        self._fixed_tokens = 0
+        self.start_step()
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+
+    def start_step(self) -> None:
+        self.peak_tokens = 0
+        self.trimmed = 0
+        self.start_attempt()
+
+    def start_attempt(self) -> None:
+        self.cycles = 0
+        self.cut_off = False
+
+    def _fixed(self, agent) -> int:
+        # The system prompt and tool specs go out with every call; tokenize them once per configuration
+        system_prompt = getattr(agent, "system_prompt", None) or ""
+        key = (system_prompt, tuple(agent.tool_names))
+        if key != self._fixed_key:
+            specs = json.dumps(agent.tool_registry.get_all_tool_specs(), default=str)
+            self._fixed_tokens = (
+                count_tokens(system_prompt, self.tokenizer) + PER_MESSAGE_OVERHEAD + count_tokens(specs, self.tokenizer)
+            )
+            self._fixed_key = key
+        return self._fixed_tokens
+
+    def before_model_call(self, event: BeforeModelCallEvent) -> None:
+        if self.max_cycles is not None and self.cycles >= self.max_cycles:
+            # Ends the event loop with this text as the final assistant message
+            self.cut_off = True
+            event.cancel = f"Stopped after {self.cycles} model calls without a final answer."
+            return
+        self.cycles += 1
+        total, trimmed = enforce_message_budget(
+            event.agent.messages, self.counter, self.max_tokens, self.policy, extra_tokens=self._fixed(event.agent)
+        )
+        self.peak_tokens = max(self.peak_tokens, total)
+        self.trimmed += trimmed
+
+
 class StrandsAgentWrapper(BaseAgent):
-    def __init__(self, memory_backend: str | None = None, **kwargs):
-        self.agent = build_agent()
+    def __init__(
+        self,
+        memory_backend: str | None = None,
+        max_prompt_length: int | None = None,
+        overflow_policy: str | None = None,
+        tokenizer_path: str = "./local_tokenizer",
+        models: list[str] | None = None,
+        task_cost_budget: float | None = None,
+        task_latency_budget: float | None = None,
+        max_cycles: int | None = None,
+        stream: bool | None = None,
+        max_response_length: int | None = None,
+        stop_markers: list[str] | None = None,
+        temperature: float | None = None,
+        share_page_cache: bool | None = None,
+        **kwargs,
+    ):
+        self._cascade = ModelCascade.from_env(
+            models=models,
+            max_cost_usd=task_cost_budget,
+            max_latency_s=task_latency_budget,
+            max_cycles=max_cycles,
+        )
+        # The wrapper owns the interactive browser so its Chromium can be shut down when the task ends
+        self._browser = LocalChromiumBrowser()
+        weakref.finalize(self, close_browser, self._browser)
+        self.agent = build_agent(
+            model_id=self._cascade.current_model,
+            temperature=temperature,
+            share_page_cache=share_page_cache,
+            browser=self._browser,
+        )
         self._trajectory = Trajectory()
+        self._tokenizer = load_tokenizer(tokenizer_path)
         self._chat_history = []
         backend = (memory_backend or os.getenv("STRANDS_MEMORY", "mem0")).lower()
         self._memory = Mem1Memory() if backend == "mem1" and Mem1Memory else None
         self._verbose = os.getenv("STRANDS_VERBOSE", "0").lower() in ("1", "true")
+        if max_prompt_length is None and os.getenv("STRANDS_MAX_PROMPT_LENGTH"):
+            max_prompt_length = int(os.getenv("STRANDS_MAX_PROMPT_LENGTH"))
+        self._max_prompt_length = max_prompt_length
+        self._overflow_policy = (overflow_policy or os.getenv("STRANDS_OVERFLOW_POLICY", "truncate")).lower()
+        if self._overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}, got {self._overflow_policy!r}")
+        if stream is None:
+            stream = os.getenv("STRANDS_STREAM", "0").lower() in ("1", "true")
+        self._stream = stream
+        self._budget = _ModelCallGuard(
+            self._tokenizer, self._max_prompt_length, self._overflow_policy, max_cycles=self._cascade.max_cycles
+        )
+        self.agent.hooks.add_hook(self._budget)
+        self._max_response_length = max_response_length
+        if stop_markers is None:
+            stop_markers = [m for m in os.getenv("STRANDS_STOP_MARKERS", "").split(",") if m]
+        self._stop_markers = stop_markers
         self.reset()
 
     def _normalize_response_text(self, result) -> str:
@@ -78,6 +197,136 @@ class StrandsAgentWrapper(BaseAgent):
                         print(f"[StrandsWrapper] MEM1.update() error: {e}")
 
         self._trajectory.steps.append(Step(observation=observation, reward=reward, done=done, info=info))
+        if done:
+            close_browser(self._browser)
+
+    def _record_prompt_budget(self) -> None:
+        if self._verbose:
+            print(
+                f"[StrandsWrapper] Peak prompt tokens: {self._budget.peak_tokens}"
+                + (f"/{self._max_prompt_length}" if self._max_prompt_length else "")
+                + (f" (trimmed {self._budget.trimmed} agent messages)" if self._budget.trimmed else "")
+            )
+        if self._trajectory.steps:
+            self._trajectory.steps[-1].info["prompt_tokens"] = self._budget.peak_tokens
+
+    def _use_model(self, model_id: str) -> None:
+        model = getattr(self.agent, "model", None)
+        try:
+            if model is not None and model.get_config().get("model_id") != model_id:
+                model.update_config(model_id=model_id)
+        except Exception as e:
+            if self._verbose:
+                print(f"[StrandsWrapper] Could not switch model to {model_id}: {e}")
+
+    def _usage_snapshot(self) -> tuple[int, int]:
+        metrics = getattr(self.agent, "event_loop_metrics", None)
+        usage = getattr(metrics, "accumulated_usage", None) or {}
+        return int(usage.get("inputTokens", 0)), int(usage.get("outputTokens", 0))
+
+    def _count_tool_errors(self, before: list) -> int:
+        # The budget hook may trim from the front, so new messages are found by identity, not index
+        seen = {id(m) for m in before}
+        errors = 0
+        for message in getattr(self.agent, "messages", None) or []:
+            if id(message) in seen:
+                continue
+            for block in message.get("content", []) or []:
+                if isinstance(block, dict) and (block.get("toolResult") or {}).get("status") == "error":
+                    errors += 1
+        return errors
+
+    def _record_routing(self, latency_s: float, response: str, usage_before: tuple[int, int], before: list, failed: bool):
+        step_idx = max(len(self._trajectory.steps) - 1, 0)
+        usage_after = self._usage_snapshot()
+        rec = self._cascade.record(
+            step_idx,
+            latency_s,
+            response,
+            input_tokens=usage_after[0] - usage_before[0],
+            output_tokens=usage_after[1] - usage_before[1],
+            tool_errors=self._count_tool_errors(before),
+            error=failed,
+            cycles=self._budget.cycles,
+            cut_off=self._budget.cut_off,
+        )
+        if self._trajectory.steps:
+            info = self._trajectory.steps[-1].info
+            info["model"] = rec.model
+            # One entry per attempt; an escalated step holds the weak and the strong attempt
+            info.setdefault("routing", []).append(rec.to_dict())
+        if self._verbose:
+            print(
+                f"[StrandsWrapper] Step {rec.step} served by {rec.model} "
+                f"({rec.latency_s:.2f}s, ${rec.cost_usd:.5f})"
+                + (f"; escalating to {rec.escalated_to} on {', '.join(rec.signals)}" if rec.escalated_to else "")
+            )
+        return rec
+
+    async def _consume_stream(self, prompt: str) -> tuple[str, dict]:
+        chunks: list[str] = []
+        n_tokens = 0  # latest model turn only; the cutoff and tokens/sec use this
+        total_tokens = 0
+        tail = ""
+        keep = max((len(m) for m in self._stop_markers), default=1) - 1
+        cutoff = None
+        started = time.perf_counter()
+        first_token_at = None
+        turn_started = None
+        stream = self.agent.stream_async(prompt)
+        try:
+            async for event in stream:
+                if not isinstance(event, dict):
+                    continue
+                if "messageStart" in (event.get("event") or {}):
+                    # Only the text of the latest model turn becomes the response
+                    chunks = []
+                    n_tokens = 0
+                    turn_started = None
+                    tail = ""
+                data = event.get("data")
+                if not isinstance(data, str) or not data:
+                    continue
+                now = time.perf_counter()
+                if first_token_at is None:
+                    first_token_at = now
+                if turn_started is None:
+                    turn_started = now
+                chunks.append(data)
+                tokens = count_tokens(data, self._tokenizer)
+                n_tokens += tokens
+                total_tokens += tokens
+                window = tail + data
+                tail = window[-keep:] if keep else ""
+                if self._max_response_length and n_tokens >= self._max_response_length:
+                    cutoff = "length"
+                    break
+                if any(m in window for m in self._stop_markers):
+                    cutoff = "stop_marker"
+                    break
+        finally:
+            await stream.aclose()
+        finished = time.perf_counter()
+        text = "".join(chunks).strip()
+        if cutoff:
+            # A cancelled turn leaves the user message unanswered; close it so the next call is well-formed
+            messages = getattr(self.agent, "messages", None)
+            if messages and messages[-1].get("role") == "user":
+                messages.append({"role": "assistant", "content": [{"text": text or "(cut off)"}]})
+        ttft = (first_token_at - started) if first_token_at is not None else None
+        gen_time = (finished - turn_started) if turn_started is not None else 0.0
+        return text, {
+            "ttft_s": ttft,
+            "tokens": n_tokens,
+            "tokens_per_s": (n_tokens / gen_time) if gen_time > 0 else None,
+            "total_tokens": total_tokens,
+            "cutoff": cutoff,
+        }
+
+    def _stream_call(self, prompt: str) -> tuple[str, dict]:
+        # update_from_model runs inside the engine's event loop, so the stream gets its own loop
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self._consume_stream(prompt)).result()
 
     def update_from_model(self, response: str, **kwargs) -> Action:
         enriched = None
@@ -100,13 +349,55 @@ class StrandsAgentWrapper(BaseAgent):
         if enriched:
             if self._verbose:
                 print(f"[StrandsWrapper] Calling Strands with:\n{enriched[:500]}")
-            try:
-                strands_resp = self.agent(enriched)
-                response = self._normalize_response_text(strands_resp)
+            self._budget.start_step()
+            before = list(getattr(self.agent, "messages", None) or [])
+            stream_info = None
+            for _ in range(len(self._cascade.models)):
+                self._use_model(self._cascade.current_model)
+                self._budget.start_attempt()
+                usage_before = self._usage_snapshot()
+                failed = False
+                started = time.perf_counter()
+                try:
+                    if self._stream:
+                        response, stream_info = self._stream_call(enriched)
+                    else:
+                        strands_resp = self.agent(enriched)
+                        response = self._normalize_response_text(strands_resp)
+                    if self._verbose:
+                        print(f"[StrandsWrapper] Strands resp: {response[:200]}")
+                except Exception as e:
+                    # Strands wraps hook errors; the "error" overflow policy must still surface
+                    cause = getattr(e, "original_exception", e)
+                    if isinstance(cause, PromptLengthExceeded):
+                        raise cause from e
+                    failed = True
+                    print(f"Error calling Strands agent: {e}")
+                rec = self._record_routing(
+                    time.perf_counter() - started,
+                    response if isinstance(response, str) else "",
+                    usage_before,
+                    before,
+                    failed,
+                )
+                if not rec.escalated_to:
+                    break
+                # Re-ask this step on the stronger model from the same conversation state
+                messages = getattr(self.agent, "messages", None)
+                if isinstance(messages, list):
+                    messages[:] = before
+            self._record_prompt_budget()
+            if stream_info is not None:
+                if self._trajectory.steps:
+                    self._trajectory.steps[-1].info["stream"] = stream_info
                 if self._verbose:
-                    print(f"[StrandsWrapper] Strands resp: {response[:200]}")
-            except Exception as e:
-                print(f"Error calling Strands agent: {e}")
+                    ttft = stream_info["ttft_s"]
+                    tps = stream_info["tokens_per_s"]
+                    print(
+                        f"[StrandsWrapper] Stream: ttft={'n/a' if ttft is None else f'{ttft:.2f}s'}, "
+                        f"{stream_info['tokens']} tokens at {'n/a' if tps is None else f'{tps:.1f}'} tok/s"
+                        + (f", cut off ({stream_info['cutoff']})" if stream_info["cutoff"] else "")
+                    )
 
         resp_text = response if isinstance(response, str) else self._normalize_response_text(response)
         self._chat_history.append({"role": "assistant", "content": resp_text})
@@ -114,8 +405,24 @@ class StrandsAgentWrapper(BaseAgent):
             self._trajectory.steps[-1].model_response = resp_text
         return Action(action=resp_text)
 
+    def release_memory(self) -> None:
+        """Drop the Strands agent's accumulated message list along with this wrapper's history."""
+        messages = getattr(self.agent, "messages", None)
+        if isinstance(messages, list):
+            messages.clear()
+        self.reset()
+
+    def close(self) -> None:
+        """Shut down the interactive browser's Chromium; it relaunches if the agent browses again."""
+        close_browser(self._browser)
+
     def reset(self):
+        # A new task gets fresh browser sessions instead of the previous task's tabs
+        self.close()
         self._trajectory = Trajectory()
+        self._cascade.start_task()
+        self._budget.counter.clear()
+        self._use_model(self._cascade.current_model)
         self._chat_history = [{"role": "system", "content": "You are a helpful assistant."}]
         if self._verbose:
             tool_names = []
@@ -124,3 +431,4 @@ class StrandsAgentWrapper(BaseAgent):
                 tool_names.append(name)
             print(f"[StrandsWrapper] Tools: {', '.join(tool_names) or '[]'}")
             print(f"[StrandsWrapper] Memory backend: {'MEM1' if self._memory else 'mem0/default'}")
+            print(f"[StrandsWrapper] Model cascade: {' -> '.join(self._cascade.models)}")
@@ -35,7 +35,7 @@ def main() -> None:
     engine_config = {
         "agent_class": StrandsAgentWrapper,
         "env_class": StrandsEnv,
-        "agent_args": {},
+        "agent_args": {"max_prompt_length": 2000},
         "env_args": {},
         "engine_name": "openai",
         "tokenizer": tokenizer,
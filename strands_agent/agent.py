@@ -10,6 +10,10 @@ from strands.models.openai import OpenAIModel
 from strands_tools.browser import LocalChromiumBrowser
 import os
 
+from strands_agent.browser_pool import get_shared_pool
+from strands_agent.parallel_browser import DEFAULT_MAX_TABS, ParallelBrowser, get_shared_page_cache
+from strands_agent.routing import ModelCascade
+
 # Optional mem0 memory tool from Strands SDK (simple try-import)
 try:
     from strands_tools.memory.mem0 import mem0_memory  # type: ignore
@@ -17,19 +21,64 @@ except Exception:
     mem0_memory = None  # type: ignore
 
 
-def build_agent() -> Agent:
+def build_agent(
+    model_id: str | None = None,
+    max_parallel_tabs: int | None = None,
+    temperature: float | None = None,
+    share_page_cache: bool | None = None,
+    browser: LocalChromiumBrowser | None = None,
+) -> Agent:
     """
     Build Strands agent with official LocalChromiumBrowser tool and OpenAI model.
+
+    ``model_id`` defaults to the first model of ``STRANDS_MODEL_CASCADE`` (or
+    ``gpt-4o-mini``); a ``ModelCascade`` may switch it between steps via
+    ``agent.model.update_config(model_id=...)``.
+
+    The agent also gets a ``browse_many`` tool that loads several URLs in
+    parallel tabs, capped at ``max_parallel_tabs`` (``STRANDS_MAX_TABS`` env var
+    when not given).  All agents in the process fetch through one shared
+    headless Chromium rather than a browser per agent.  With ``STRANDS_BROWSER_WORKERS`` > 0, ``browse_many`` fetches
+    pages in isolated browser worker processes, so a crashed or hung page there
+    cannot take down the rollout.  The interactive LocalChromiumBrowser tool is
+    always available and still runs in this process; it drives ``browser`` (a
+    new one when not given), whose Chromium stays up until ``close_browser``.
+
+    With ``share_page_cache`` (``STRANDS_PAGE_CACHE`` env var when not given),
+    ``browse_many`` also goes through a process-wide page cache, so e.g. the
+    other samples of the same question reuse its pages.  The interactive
+    browser tool keeps per-agent sessions and is not shared; the system prompt
+    steers reading towards ``browse_many`` in that mode.
     """
     load_dotenv()
 
-    browser = LocalChromiumBrowser()
-    model = OpenAIModel(model_id="gpt-4o-mini")
+    pool = get_shared_pool()
+    if model_id is None:
+        model_id = ModelCascade.from_env().current_model
+    params = {"temperature": temperature} if temperature is not None else None
+    model = OpenAIModel(model_id=model_id, params=params)
+
+    if max_parallel_tabs is None:
+        max_parallel_tabs = int(os.getenv("STRANDS_MAX_TABS", DEFAULT_MAX_TABS))
+    if share_page_cache is None:
+        share_page_cache = os.getenv("STRANDS_PAGE_CACHE", "0").lower() in ("1", "true")
+    cache = get_shared_page_cache() if share_page_cache else None
+    parallel_browser = ParallelBrowser(max_tabs=max_parallel_tabs, pool=pool, cache=cache)
 
     mem0_api_key = os.getenv("MEM0_API_KEY")
     memory_user_id = os.getenv("MEMORY_USER_ID", "default_user")
 
-    tools = [browser.browser]
+    if browser is None:
+        browser = LocalChromiumBrowser()
+    tools = [browser.browser, parallel_browser.browse_many]
+    browsing_guidance = """
+        Use the browser tool to navigate websites and find specific information.
+        When asked to find current information like prices or facts, browse relevant websites to get accurate data.
+        When you have several candidate URLs to check, use browse_many to load them in parallel instead of one by one."""
+    if share_page_cache:
+        browsing_guidance += """
+        To read a page whose URL you already know, prefer browse_many; use the browser tool only when you need to interact with a page."""
+
     if mem0_api_key and mem0_memory is not None:
         tools.append(mem0_memory)
         memory_guidance = (
@@ -44,11 +93,22 @@ def build_agent() -> Agent:
         model=model,
         tools=tools,
         system_prompt=(
-            """You are a helpful assistant with web browsing capabilities.
-        Use the browser tool to navigate websites and find specific information.
-        When asked to find current information like prices or facts, browse relevant websites to get accurate data."""
+            "You are a helpful assistant with web browsing capabilities."
+            + browsing_guidance
             + memory_guidance
         ),
     )
 
-    return agent
\ No newline at end of file
+    return agent
+
+
+def close_browser(browser: LocalChromiumBrowser) -> None:
+    """
+    Shut down the Chromium sessions and Playwright driver of an interactive
+    browser tool.  The tool starts them again if it is used afterwards.
+    """
+    try:
+        browser._cleanup()
+    except Exception:
+        # Same as the tool's own destructor: a browser that is already gone has nothing to release
+        pass
@@ -0,0 +1,279 @@
+"""
+strands_agent/browser_pool.py
+
+Process-isolated browser workers for page fetching.
+
+Each worker is a dedicated process that owns one headless Chromium and serves
+fetch requests from agents over a pipe.  A crashed browser only takes down its
+worker, which is respawned.  A hung page only fails its own URL, through a
+per-page deadline inside the worker; a worker whose browser stops answering
+altogether is killed and replaced.  Workers are recycled after a
+configurable number of pages or once their process tree exceeds an RSS
+threshold, so memory stays flat over long evaluations.
+"""
+
+import atexit
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from strands_agent.parallel_browser import PAGE_CLOSE_TIMEOUT_S
+from strands_agent.rss import process_tree_rss_bytes
+
+DEFAULT_MAX_PAGES_PER_WORKER = 200
+DEFAULT_MAX_RSS_MB = 2048
+DEFAULT_PAGE_TIMEOUT_S = 60.0
+
+
+def _worker_main(conn: Any, launch_options: Dict[str, Any]) -> None:
+    """Worker process entry point: serve fetch requests until told to stop."""
+    import asyncio
+
+    from playwright.async_api import async_playwright
+
+    from strands_agent.parallel_browser import fetch_pages
+
+    loop = asyncio.new_event_loop()
+    state: Dict[str, Any] = {}
+
+    async def _context() -> Any:
+        if "browser" in state and not state["browser"].is_connected():
+            # Chromium crashed under us; drop it and relaunch instead of failing every request
+            state.pop("browser")
+            state.pop("context", None)
+        if "playwright" not in state:
+            state["playwright"] = await async_playwright().start()
+        if "browser" not in state:
+            state["browser"] = await state["playwright"].chromium.launch(**launch_options)
+            state["context"] = await state["browser"].new_context()
+        return state["context"]
+
+    async def _fetch(req: Dict[str, Any]) -> List[Dict[str, Any]]:
+        context = await _context()
+        return await fetch_pages(
+            context, req["urls"], req["max_tabs"], req["max_chars"], req["timeout_ms"], req["page_timeout_s"]
+        )
+
+    async def _shutdown() -> None:
+        if "browser" in state and state["browser"].is_connected():
+            await state["browser"].close()
+        if "playwright" in state:
+            await state["playwright"].stop()
+
+    try:
+        while True:
+            try:
+                req = conn.recv()
+            except EOFError:
+                break
+            if req is None:
+                break
+            try:
+                reply = {"pages": loop.run_until_complete(_fetch(req))}
+            except Exception as e:
+                reply = {"error": str(e)}
+            reply["rss"] = process_tree_rss_bytes(os.getpid())
+            conn.send(reply)
+    finally:
+        try:
+            loop.run_until_complete(_shutdown())
+        except Exception:
+            pass
+        loop.close()
+
+
+class _Worker:
+    def __init__(self, ctx: Any, launch_options: Dict[str, Any], generation: int) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, launch_options), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.generation = generation
+        self.pages_served = 0
+        self.rss_bytes = 0
+        self.failed = False
+
+    def request(self, req: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        self.conn.send(req)
+        if not self.conn.poll(timeout_s):
+            raise TimeoutError(f"browser worker did not answer within {timeout_s:.0f}s")
+        return self.conn.recv()
+
+    def stop(self, grace_s: float = 5.0) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(grace_s)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+        self.conn.close()
+
+
+class BrowserWorkerPool:
+    """
+    Pool of browser worker processes shared by all agents in this process.
+
+    Args:
+        n_workers: Number of worker processes (each with its own Chromium).
+        max_pages_per_worker: Recycle a worker after serving this many pages.
+        max_rss_mb: Recycle a worker once its process tree RSS exceeds this.
+        page_timeout_s: Deadline per page, applied inside the worker.  A worker
+            that does not answer within that per round of ``max_tabs`` pages
+            (plus time to close pages and relaunch Chromium) is killed.
+        launch_options: Playwright ``chromium.launch`` options.
+    """
+
+    def __init__(
+        self,
+        n_workers: int = 2,
+        max_pages_per_worker: int = DEFAULT_MAX_PAGES_PER_WORKER,
+        max_rss_mb: Optional[float] = DEFAULT_MAX_RSS_MB,
+        page_timeout_s: float = DEFAULT_PAGE_TIMEOUT_S,
+        launch_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.n_workers = max(1, n_workers)
+        self.max_pages_per_worker = max_pages_per_worker
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024) if max_rss_mb else None
+        self.page_timeout_s = page_timeout_s
+        self._launch_options = {"headless": True, **(launch_options or {})}
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._started = False
+        self._closed = False
+        self.restarts = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["BrowserWorkerPool"]:
+        """Build from ``STRANDS_BROWSER_*`` env vars; None when workers are disabled."""
+        n_workers = int(os.getenv("STRANDS_BROWSER_WORKERS", "0"))
+        if n_workers <= 0:
+            return None
+        return cls(
+            n_workers=n_workers,
+            max_pages_per_worker=int(os.getenv("STRANDS_BROWSER_MAX_PAGES", DEFAULT_MAX_PAGES_PER_WORKER)),
+            max_rss_mb=float(os.getenv("STRANDS_BROWSER_MAX_RSS_MB", DEFAULT_MAX_RSS_MB)),
+            page_timeout_s=float(os.getenv("STRANDS_BROWSER_PAGE_TIMEOUT", DEFAULT_PAGE_TIMEOUT_S)),
+        )
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self._launch_options, self._generation)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BrowserWorkerPool is closed")
+            if not self._started:
+                for _ in range(self.n_workers):
+                    self._idle.put(self._spawn())
+                self._started = True
+
+    def _replace(self, worker: _Worker, graceful: bool) -> _Worker:
+        if graceful:
+            worker.stop()
+        else:
+            worker.kill()
+        self.restarts += 1
+        return self._spawn()
+
+    def _release(self, worker: _Worker) -> None:
+        stale = worker.generation < self._generation
+        over_pages = self.max_pages_per_worker and worker.pages_served >= self.max_pages_per_worker
+        over_rss = self.max_rss_bytes and worker.rss_bytes >= self.max_rss_bytes
+        if stale or over_pages or over_rss or worker.failed:
+            worker = self._replace(worker, graceful=True)
+        if self._closed:
+            worker.stop()
+        else:
+            self._idle.put(worker)
+
+    def fetch(
+        self,
+        urls: List[str],
+        max_tabs: int,
+        max_chars: int,
+        timeout_ms: int,
+    ) -> List[Dict[str, Any]]:
+        """Fetch ``urls`` on an idle worker; errors come back per URL instead of raising."""
+        self._ensure_started()
+        req = {
+            "urls": urls,
+            "max_tabs": max_tabs,
+            "max_chars": max_chars,
+            "timeout_ms": timeout_ms,
+            "page_timeout_s": self.page_timeout_s,
+        }
+        # Slow pages time out inside the worker; missing this means the browser itself stopped responding
+        rounds = math.ceil(len(urls) / max(1, max_tabs))
+        deadline = rounds * (self.page_timeout_s + PAGE_CLOSE_TIMEOUT_S) + self.page_timeout_s
+        worker = self._idle.get()
+        try:
+            for attempt in range(2):
+                try:
+                    reply = worker.request(req, deadline)
+                except TimeoutError as e:
+                    # An unresponsive browser: kill this worker only, other tasks keep their workers
+                    worker = self._replace(worker, graceful=False)
+                    return [{"url": u, "error": f"{e}; worker restarted"} for u in urls]
+                except (EOFError, OSError, BrokenPipeError) as e:
+                    # Browser crashed and took its worker down; respawn and retry once
+                    worker = self._replace(worker, graceful=False)
+                    if attempt == 0:
+                        continue
+                    return [{"url": u, "error": f"browser worker crashed: {e}"} for u in urls]
+                worker.pages_served += len(urls)
+                worker.rss_bytes = reply.get("rss", 0)
+                if "error" in reply:
+                    # The worker's browser may be wedged; give the next request a fresh one
+                    worker.failed = True
+                    return [{"url": u, "error": reply["error"]} for u in urls]
+                return reply["pages"]
+            return [{"url": u, "error": "browser worker unavailable"} for u in urls]
+        finally:
+            self._release(worker)
+
+    def recycle_all(self) -> None:
+        """Recycle every worker: idle ones now, busy ones when they are released."""
+        with self._lock:
+            self._generation += 1
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in idle:
+            self._release(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_shared_pool: Optional[BrowserWorkerPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool() -> Optional[BrowserWorkerPool]:
+    """Process-wide pool configured from env vars, or None when disabled."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = BrowserWorkerPool.from_env()
+            if _shared_pool is not None:
+                atexit.register(_shared_pool.close)
+        return _shared_pool
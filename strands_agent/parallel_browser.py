@@ -0,0 +1,352 @@
+"""
+strands_agent/parallel_browser.py
+
+Concurrent multi-page browsing tool for the Strands agent.
+
+``LocalChromiumBrowser`` drives a single page per action, so checking several
+candidate URLs from a search result costs one full page load after another.
+``ParallelBrowser`` exposes a ``browse_many`` tool that loads a list of URLs in
+parallel tabs of one headless Chromium shared by every agent in the process,
+bounded by a per-agent concurrency cap, and returns the compacted page text for
+all of them in a single tool result.
+"""
+
+import asyncio
+import atexit
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from strands import tool
+
+DEFAULT_MAX_TABS = 4
+DEFAULT_MAX_CHARS = 4000
+DEFAULT_TIMEOUT_MS = 20000
+PAGE_CLOSE_TIMEOUT_S = 5.0
+DEFAULT_CACHE_ENTRIES = 512
+DEFAULT_CACHE_TTL_S = 3600.0
+
+
+def compact_text(text: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
+    """Collapse whitespace and truncate page text to ``max_chars`` characters."""
+    text = re.sub(r"[ \t\r\f\v]+", " ", text or "")
+    text = re.sub(r"\s*\n\s*", "\n", text).strip()
+    if len(text) > max_chars:
+        text = text[:max_chars].rstrip() + " ..."
+    return text
+
+
+async def fetch_pages(
+    context: Any,
+    urls: List[str],
+    max_tabs: int = DEFAULT_MAX_TABS,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    page_deadline_s: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Load ``urls`` in parallel tabs of a Playwright browser context.
+
+    At most ``max_tabs`` pages are open at once.  Results come back in the
+    order of ``urls``; a page that fails to load, or is still loading after
+    ``page_deadline_s`` (default: the navigation plus text timeouts), yields an
+    entry with an ``error`` message instead of failing the whole batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_tabs))
+    if page_deadline_s is None:
+        page_deadline_s = 2 * timeout_ms / 1000
+
+    async def _load(url: str, opened: List[Any]) -> Dict[str, Any]:
+        page = await context.new_page()
+        opened.append(page)
+        await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+        title = await page.title()
+        body = await page.inner_text("body", timeout=timeout_ms)
+        return {"url": url, "title": title, "text": compact_text(body, max_chars)}
+
+    async def _fetch_one(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            opened: List[Any] = []
+            try:
+                return await asyncio.wait_for(_load(url, opened), page_deadline_s)
+            except asyncio.TimeoutError:
+                return {"url": url, "error": f"page did not load within {page_deadline_s:g}s"}
+            except Exception as e:
+                return {"url": url, "error": str(e)}
+            finally:
+                for page in opened:
+                    try:
+                        await asyncio.wait_for(page.close(), PAGE_CLOSE_TIMEOUT_S)
+                    except Exception:
+                        pass
+
+    return list(await asyncio.gather(*(_fetch_one(u) for u in urls)))
+
+
+def format_pages(pages: List[Dict[str, Any]]) -> str:
+    """Render fetched pages as one text block for the model."""
+    sections = []
+    for i, page in enumerate(pages, 1):
+        header = f"[{i}] {page['url']}"
+        if page.get("error"):
+            sections.append(f"{header}\nERROR: {page['error']}")
+        else:
+            title = page.get("title") or ""
+            sections.append(f"{header}\nTitle: {title}\n{page.get('text', '')}")
+    return "\n\n".join(sections)
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache of fetched pages shared by several agents.
+
+    Concurrent requests for the same URL are single-flighted: the first caller
+    fetches it and the others wait for that result instead of loading the page
+    again.  Failed loads are not cached.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, ttl_s: float = DEFAULT_CACHE_TTL_S) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl_s:
+            del self._entries[url]
+            return None
+        self._entries.move_to_end(url)
+        return entry[1]
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._lookup(url)
+
+    def claim(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[threading.Event]]:
+        """
+        Return ``(page, None)`` on a hit, ``(None, event)`` if another caller is
+        already loading ``url``, or ``(None, None)`` if the caller must load it
+        and then call ``release``.
+        """
+        with self._lock:
+            page = self._lookup(url)
+            if page is not None:
+                self.hits += 1
+                return page, None
+            if url in self._inflight:
+                self.hits += 1
+                return None, self._inflight[url]
+            self.misses += 1
+            self._inflight[url] = threading.Event()
+            return None, None
+
+    def release(self, url: str, page: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            if page is not None and not page.get("error"):
+                self._entries[url] = (time.monotonic(), page)
+                self._entries.move_to_end(url)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            event = self._inflight.pop(url, None)
+        if event is not None:
+            event.set()
+
+
+_shared_cache: Optional[PageCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_page_cache() -> PageCache:
+    """Process-wide page cache sized by ``STRANDS_PAGE_CACHE_SIZE``."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PageCache(int(os.getenv("STRANDS_PAGE_CACHE_SIZE", DEFAULT_CACHE_ENTRIES)))
+        return _shared_cache
+
+
+class LocalPageFetcher:
+    """
+    Headless Chromium on a private event loop thread.
+
+    Like ``LocalChromiumBrowser``, the browser lives on its own loop so it
+    survives across agent invocations, which each run on their own loop.  The
+    loop runs on a background thread, so several agents can fetch through one
+    fetcher at once.  ``fetch`` has the same signature as
+    ``BrowserWorkerPool.fetch``.
+    """
+
+    def __init__(self, launch_options: Optional[Dict[str, Any]] = None) -> None:
+        self._launch_options = {"headless": True, **(launch_options or {})}
+        self._loop = asyncio.new_event_loop()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    def _run(self, coro: Any) -> Any:
+        with self._lock:
+            if self._loop.is_closed():
+                coro.close()
+                raise RuntimeError("LocalPageFetcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop.run_forever, name="page-fetcher", daemon=True)
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _ensure_context(self) -> Any:
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._context is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(**self._launch_options)
+                self._context = await self._browser.new_context()
+        return self._context
+
+    async def _fetch(self, urls: List[str], max_tabs: int, max_chars: int, timeout_ms: int) -> List[Dict[str, Any]]:
+        context = await self._ensure_context()
+        return await fetch_pages(context, urls, max_tabs, max_chars, timeout_ms)
+
+    def fetch(self, urls: List[str], max_tabs: int, max_chars: int, timeout_ms: int) -> List[Dict[str, Any]]:
+        """Fetch ``urls`` concurrently and return one result dict per URL."""
+        return self._run(self._fetch(urls, max_tabs, max_chars, timeout_ms))
+
+    async def _close_browser(self) -> None:
+        browser, playwright = self._browser, self._playwright
+        self._context = self._browser = self._playwright = None
+        if browser is not None:
+            await browser.close()
+        if playwright is not None:
+            await playwright.stop()
+
+    def recycle(self) -> None:
+        """Shut down Chromium; the next fetch launches a fresh one."""
+        with self._lock:
+            running = self._thread is not None and not self._loop.is_closed()
+        if running:
+            asyncio.run_coroutine_threadsafe(self._close_browser(), self._loop).result()
+
+    def close(self) -> None:
+        """Shut down the browser and its event loop."""
+        with self._lock:
+            if self._loop.is_closed():
+                return
+            if self._thread is None:
+                self._loop.run_until_complete(self._close_browser())
+            else:
+                asyncio.run_coroutine_threadsafe(self._close_browser(), self._loop).result()
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+            self._loop.close()
+
+
+_shared_fetcher: Optional[LocalPageFetcher] = None
+_shared_fetcher_lock = threading.Lock()
+
+
+def get_shared_fetcher() -> LocalPageFetcher:
+    """Process-wide in-process Chromium used by every ``ParallelBrowser`` without a worker pool."""
+    global _shared_fetcher
+    with _shared_fetcher_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = LocalPageFetcher()
+            atexit.register(_shared_fetcher.close)
+        return _shared_fetcher
+
+
+class ParallelBrowser:
+    """
+    ``browse_many`` tool for one agent.
+
+    The object only holds per-agent settings and owns no browser: pages are
+    fetched by the given ``BrowserWorkerPool`` or, without one, by the
+    process-wide ``LocalPageFetcher``, so building an agent per task does not
+    leave a Chromium behind.  With a ``PageCache``, pages already loaded by any
+    agent sharing it are reused.
+    """
+
+    def __init__(
+        self,
+        max_tabs: int = DEFAULT_MAX_TABS,
+        max_chars: int = DEFAULT_MAX_CHARS,
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+        pool: Any = None,
+        cache: Optional[PageCache] = None,
+    ) -> None:
+        self.max_tabs = max_tabs
+        self.max_chars = max_chars
+        self.timeout_ms = timeout_ms
+        self._pool = pool
+        self._cache = cache
+
+    def fetch(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """Fetch ``urls`` concurrently and return one result dict per URL."""
+        if self._cache is None:
+            return self._fetch_uncached(urls)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        mine: List[str] = []
+        waiting: List[Tuple[str, threading.Event]] = []
+        for url in urls:
+            page, event = self._cache.claim(url)
+            if page is not None:
+                results[url] = page
+            elif event is not None:
+                waiting.append((url, event))
+            else:
+                mine.append(url)
+        # Load our own claims before waiting on others so no two callers wait on each other
+        if mine:
+            fetched: Dict[str, Dict[str, Any]] = {}
+            try:
+                fetched = {page["url"]: page for page in self._fetch_uncached(mine)}
+            except Exception as e:
+                fetched = {url: {"url": url, "error": str(e)} for url in mine}
+            finally:
+                for url in mine:
+                    page = fetched.get(url) or {"url": url, "error": "page was not loaded"}
+                    self._cache.release(url, page)
+                    results[url] = page
+        for url, event in waiting:
+            # Owners always release their claims, so this returns once that load finishes
+            event.wait()
+            results[url] = self._cache.get(url) or {"url": url, "error": "shared page load failed"}
+        return [results[url] for url in urls]
+
+    def _fetch_uncached(self, urls: List[str]) -> List[Dict[str, Any]]:
+        backend = self._pool if self._pool is not None else get_shared_fetcher()
+        return backend.fetch(urls, self.max_tabs, self.max_chars, self.timeout_ms)
+
+    @tool
+    def browse_many(self, urls: List[str]) -> Dict[str, Any]:
+        """
+        Open several web pages at once in parallel tabs and return their text.
+
+        Use this instead of navigating one page at a time when you have multiple
+        candidate URLs to check (for example, several search results).
+
+        Args:
+            urls: List of absolute URLs to load.
+        """
+        urls = [u for u in dict.fromkeys(urls or []) if isinstance(u, str) and u.strip()]
+        if not urls:
+            return {"status": "error", "content": [{"text": "No URLs provided."}]}
+        try:
+            pages = self.fetch(urls)
+        except Exception as e:
+            return {"status": "error", "content": [{"text": f"Parallel browse failed: {e}"}]}
+        return {"status": "success", "content": [{"text": format_pages(pages)}]}
@@ -0,0 +1,185 @@
+"""
+strands_agent/routing.py
+
+Cost/latency-aware model cascade for the Strands agent.
+
+Each task starts on the cheapest model in the cascade.  After every attempt the
+router looks at confidence signals (no answer found, tool errors, the attempt
+ran out of its model-call budget) and escalates to the next, stronger model, as
+long as the task is still inside its cost and latency budgets.  The caller re-asks the same
+step on the escalated model, and later steps stay on it.  Every attempt is
+recorded with the model that served it.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# USD per million (input, output) tokens; dated snapshots (gpt-4o-2024-08-06) use their base price
+MODEL_PRICES: Dict[str, tuple] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "o3-mini": (1.10, 4.40),
+}
+
+DEFAULT_CASCADE = ["gpt-4o-mini"]
+
+NO_ANSWER_PATTERNS = re.compile(
+    r"(couldn'?t|could not|unable to|can'?t|cannot|wasn'?t able to|did not|didn'?t) "
+    r"(find|locate|determine|access|retrieve|verify)"
+    r"|no (relevant )?(information|results) (was |were )?found"
+    r"|i (do not|don'?t) know",
+    re.IGNORECASE,
+)
+
+
+_warned_unpriced: set = set()
+
+
+def model_price(model_id: str) -> Optional[tuple]:
+    """(input, output) USD per million tokens for ``model_id``, or None if it is not listed."""
+    if model_id in MODEL_PRICES:
+        return MODEL_PRICES[model_id]
+    prefixes = [m for m in MODEL_PRICES if model_id.startswith(m + "-")]
+    return MODEL_PRICES[max(prefixes, key=len)] if prefixes else None
+
+
+def step_cost(model_id: str, input_tokens: int, output_tokens: int) -> float:
+    """USD cost of one step on ``model_id``; unpriced models cost zero (see ``ModelCascade``)."""
+    in_price, out_price = model_price(model_id) or (0.0, 0.0)
+    return (input_tokens * in_price + output_tokens * out_price) / 1_000_000
+
+
+@dataclass
+class StepRecord:
+    step: int
+    model: str
+    latency_s: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    cycles: int = 0
+    signals: List[str] = field(default_factory=list)
+    escalated_to: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class ModelCascade:
+    """
+    Per-task model router that escalates from cheap to strong models.
+
+    Args:
+        models: Model ids ordered from cheapest/fastest to strongest.
+        max_cost_usd: Per-task spend above which no further escalation happens;
+            every model must then be listed in ``MODEL_PRICES``.
+        max_latency_s: Per-task wall-clock time above which no further escalation happens.
+        max_cycles: Model calls (Strands event-loop cycles) one attempt may make;
+            an attempt cut off at this budget signals escalation.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        max_cost_usd: Optional[float] = None,
+        max_latency_s: Optional[float] = None,
+        max_cycles: Optional[int] = None,
+    ) -> None:
+        self.models = list(models or DEFAULT_CASCADE)
+        self.max_cost_usd = max_cost_usd
+        self.max_latency_s = max_latency_s
+        self.max_cycles = max_cycles
+        unpriced = [m for m in self.models if model_price(m) is None]
+        if unpriced and max_cost_usd is not None:
+            raise ValueError(f"No price for {unpriced} in MODEL_PRICES; a cost budget cannot be enforced on them")
+        for m in unpriced:
+            if m not in _warned_unpriced:
+                _warned_unpriced.add(m)
+                print(f"[ModelCascade] Warning: no price for {m!r} in MODEL_PRICES; its calls are costed at $0")
+        self.start_task()
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "ModelCascade":
+        """Build from ``STRANDS_MODEL_CASCADE``, ``STRANDS_MAX_CYCLES`` and the ``STRANDS_TASK_*_BUDGET`` env vars."""
+        models = overrides.pop("models", None)
+        if not models:
+            env_models = os.getenv("STRANDS_MODEL_CASCADE", "")
+            models = [m.strip() for m in env_models.split(",") if m.strip()] or None
+        cost = overrides.pop("max_cost_usd", None)
+        if cost is None and os.getenv("STRANDS_TASK_COST_BUDGET"):
+            cost = float(os.getenv("STRANDS_TASK_COST_BUDGET"))
+        latency = overrides.pop("max_latency_s", None)
+        if latency is None and os.getenv("STRANDS_TASK_LATENCY_BUDGET"):
+            latency = float(os.getenv("STRANDS_TASK_LATENCY_BUDGET"))
+        cycles = overrides.pop("max_cycles", None)
+        if cycles is None and os.getenv("STRANDS_MAX_CYCLES"):
+            cycles = int(os.getenv("STRANDS_MAX_CYCLES"))
+        return cls(models=models, max_cost_usd=cost, max_latency_s=latency, max_cycles=cycles, **overrides)
+
+    def start_task(self) -> None:
+        """Reset to the cheapest model and clear the per-task budgets and history."""
+        self._tier = 0
+        self.spent_usd = 0.0
+        self.elapsed_s = 0.0
+        self.history: List[StepRecord] = []
+
+    @property
+    def current_model(self) -> str:
+        return self.models[self._tier]
+
+    def within_budget(self) -> bool:
+        if self.max_cost_usd is not None and self.spent_usd >= self.max_cost_usd:
+            return False
+        if self.max_latency_s is not None and self.elapsed_s >= self.max_latency_s:
+            return False
+        return True
+
+    def signals_for(self, response: str, tool_errors: int = 0, error: bool = False, cut_off: bool = False) -> List[str]:
+        signals = []
+        if not (response or "").strip() or NO_ANSWER_PATTERNS.search(response or ""):
+            signals.append("no_answer")
+        if tool_errors or error:
+            signals.append("tool_error")
+        if cut_off:
+            signals.append("cycle_budget")
+        return signals
+
+    def record(
+        self,
+        step: int,
+        latency_s: float,
+        response: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        tool_errors: int = 0,
+        error: bool = False,
+        cycles: int = 0,
+        cut_off: bool = False,
+    ) -> StepRecord:
+        """
+        Record a model call served by ``current_model`` and decide whether to
+        escalate; when ``escalated_to`` is set the caller should re-ask the step.
+        """
+        model = self.current_model
+        rec = StepRecord(
+            step=step,
+            model=model,
+            latency_s=latency_s,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=step_cost(model, input_tokens, output_tokens),
+            cycles=cycles,
+            signals=self.signals_for(response, tool_errors, error, cut_off),
+        )
+        self.spent_usd += rec.cost_usd
+        self.elapsed_s += latency_s
+        if rec.signals and self._tier + 1 < len(self.models) and self.within_budget():
+            self._tier += 1
+            rec.escalated_to = self.current_model
+        self.history.append(rec)
+        return rec
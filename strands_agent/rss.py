@@ -0,0 +1,66 @@
+"""
+strands_agent/rss.py
+
+Resident set size of this process and of process trees (e.g. a browser worker
+and its Chromium renderers), with fallbacks when psutil is not installed.
+"""
+
+import os
+import sys
+from typing import Dict, List
+
+try:
+    import psutil  # Optional; exact current RSS on every platform
+except Exception:
+    psutil = None  # type: ignore
+
+
+def _statm_rss_bytes(pid: int | str) -> int:
+    with open(f"/proc/{pid}/statm", "r") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_is_peak() -> bool:
+    """True when ``current_rss_bytes`` can only report peak RSS (no psutil and no /proc)."""
+    return psutil is None and not os.path.exists("/proc/self/statm")
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of the current process (peak RSS when ``rss_is_peak()``)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        return _statm_rss_bytes("self")
+    except Exception:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and KiB on Linux/BSD
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_tree_rss_bytes(pid: int) -> int:
+    """RSS of ``pid`` plus all its descendants (e.g. Chromium renderers), Linux only."""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except Exception:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    except Exception:
+        return current_rss_bytes() if pid == os.getpid() else 0
+
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            total += _statm_rss_bytes(p)
+        except Exception:
+            pass
+        stack.extend(children.get(p, []))
+    return total
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Make the project packages importable when pytest is run from any directory
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
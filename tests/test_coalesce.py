@@ -0,0 +1,50 @@
+from eval.coalesce import coalesce_questions, coalesce_tasks
+
+LONG_Q = (
+    "Which football club, founded in the late nineteenth century by workers of a railway company, "
+    "won its first national league title in the same decade that its current stadium was opened"
+)
+
+
+def test_exact_duplicates_merge():
+    questions = ["What is the capital of France?", "Who wrote Hamlet?", "what is the capital of  FRANCE"]
+    assert coalesce_questions(questions) == [[0, 2], [1]]
+
+
+def test_near_duplicates_merge():
+    questions = [LONG_Q, "Who wrote Hamlet?", LONG_Q + " for the public"]
+    assert coalesce_questions(questions, near_dup_threshold=0.8) == [[0, 2], [1]]
+
+
+def test_near_duplicates_stay_apart_below_threshold():
+    questions = [LONG_Q, LONG_Q + " for the public"]
+    assert coalesce_questions(questions, near_dup_threshold=0.99) == [[0], [1]]
+
+
+def test_exact_only_when_threshold_disabled():
+    questions = [LONG_Q, LONG_Q + " for the public", LONG_Q.upper()]
+    expected = [[0, 2], [1]]
+    assert coalesce_questions(questions, near_dup_threshold=None) == expected
+    assert coalesce_questions(questions, near_dup_threshold=1.0) == expected
+
+
+def test_different_answers_do_not_merge():
+    questions = [LONG_Q + " in 2019", LONG_Q + " in 2021", LONG_Q + " in 2019"]
+    assert coalesce_questions(questions, near_dup_threshold=0.8, answers=["a", "b", "c"]) == [[0], [1], [2]]
+    assert coalesce_questions(questions, near_dup_threshold=0.8, answers=["a", "a", "a"]) == [[0, 1, 2]]
+
+
+def test_tasks_compare_normalized_golds():
+    tasks = [
+        {"question": "Who wrote Hamlet?", "gold": "  William Shakespeare!"},
+        {"question": "Who wrote Hamlet?", "gold": "william shakespeare"},
+        {"question": "Who wrote Hamlet?", "gold": "Christopher Marlowe"},
+    ]
+    assert coalesce_tasks(tasks) == [[0, 1], [2]]
+
+
+def test_representative_is_earliest_and_classes_are_ordered():
+    questions = ["Q b", "Q a", "Q b", "Q c", "Q a"]
+    classes = coalesce_questions(questions, near_dup_threshold=None)
+    assert classes == [[0, 2], [1, 4], [3]]
+    assert all(c == sorted(c) for c in classes)
@@ -0,0 +1,102 @@
+import base64
+import json
+
+import pytest
+
+from eval.dataset_store import MAGIC, TaskStore, _derive_key, build_store, decrypt_field
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    return str(path)
+
+
+def _encrypt(plaintext, password):
+    data = plaintext.encode("utf-8")
+    key = _derive_key(password, len(data))
+    return base64.b64encode(bytes(a ^ b for a, b in zip(data, key))).decode("ascii")
+
+
+ROWS = [
+    {"id": 1, "question": "Q one", "answer": "Paris", "problem_topic": "geo", "difficulty": "easy"},
+    {"id": 2, "question": "Q two", "answer": "42", "problem_topic": "math", "difficulty": "hard"},
+    {"id": 3, "question": "Q three", "answer": "The Hobbit", "problem_topic": "geo", "difficulty": "hard"},
+]
+
+
+def test_round_trip(tmp_path):
+    src = _write_jsonl(tmp_path / "a.jsonl", ROWS)
+    out = str(tmp_path / "tasks.store")
+    counts = build_store([src], out)
+    assert counts == {"read": 3, "written": 3, "duplicates": 0}
+
+    with TaskStore(out) as store:
+        assert len(store) == 3
+        assert [r["question"] for r in store] == ["Q one", "Q two", "Q three"]
+        assert store[-1]["gold"] == "The Hobbit"
+        assert store[1]["gold_norm"] == "42"
+        assert store.get(2)["question"] == "Q two"
+        assert store.get("2")["question"] == "Q two"
+        assert store.get(99) is None
+        with pytest.raises(IndexError):
+            store[3]
+
+
+def test_filters_use_index(tmp_path):
+    out = str(tmp_path / "tasks.store")
+    build_store([_write_jsonl(tmp_path / "a.jsonl", ROWS)], out)
+
+    with TaskStore(out) as store:
+        assert store.topics == ["geo", "math"]
+        assert store.difficulties == ["easy", "hard"]
+        assert store.positions("geo") == [0, 2]
+        assert store.positions(difficulty="hard") == [1, 2]
+        assert store.positions("geo", "hard") == [2]
+        assert store.positions("history") == []
+        assert [r["id"] for r in store.select("geo", limit=1)] == [1]
+        assert len(store.select()) == 3
+
+
+def test_duplicates_dropped_and_ids_decollided(tmp_path):
+    first = _write_jsonl(tmp_path / "first.jsonl", ROWS[:2])
+    second = _write_jsonl(
+        tmp_path / "second.jsonl",
+        [
+            ROWS[0],  # same content: dropped
+            {"id": 1, "question": "Other", "answer": "x"},
+            {"id": 1, "question": "Another", "answer": "y"},
+            {"id": 1, "question": "Third", "answer": "z"},
+        ],
+    )
+    out = str(tmp_path / "tasks.store")
+    counts = build_store([first, second], out)
+    assert counts == {"read": 6, "written": 5, "duplicates": 1}
+
+    with TaskStore(out) as store:
+        ids = [r["id"] for r in store]
+        assert ids == [1, 2, "second-1", "second-1-2", "second-1-3"]
+        assert len({str(i) for i in ids}) == len(ids)
+        assert store.get("second-1-2")["question"] == "Another"
+
+
+def test_encrypted_rows_are_decrypted(tmp_path):
+    row = {"id": 7, "question": _encrypt("Secret question", "canary-1"), "answer": _encrypt("Secret", "canary-1"), "canary": "canary-1"}
+    assert decrypt_field(row["answer"], "canary-1") == "Secret"
+    out = str(tmp_path / "tasks.store")
+    build_store([_write_jsonl(tmp_path / "enc.jsonl", [row])], out)
+
+    with TaskStore(out) as store:
+        assert store[0]["question"] == "Secret question"
+        assert store[0]["gold"] == "Secret"
+
+
+def test_rejects_non_store_file(tmp_path):
+    bogus = tmp_path / "bogus.store"
+    bogus.write_bytes(b"not a store at all, just some bytes padding the footer" * 2)
+    with pytest.raises(ValueError):
+        TaskStore(str(bogus))
+
+    truncated = tmp_path / "truncated.store"
+    truncated.write_bytes(MAGIC + b"\x00" * 64)
+    with pytest.raises(ValueError):
+        TaskStore(str(truncated))
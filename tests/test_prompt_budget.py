@@ -0,0 +1,115 @@
+import pytest
+
+from rllm_workflow.prompt_budget import (
+    ELIDED_TOOL_RESULT,
+    MessageTokenCounter,
+    PromptLengthExceeded,
+    count_tokens,
+    enforce_message_budget,
+    strands_message_text,
+)
+
+
+def _user(text):
+    return {"role": "user", "content": [{"text": text}]}
+
+
+def _assistant(text):
+    return {"role": "assistant", "content": [{"text": text}]}
+
+
+def _tool_use(tid):
+    return {"role": "assistant", "content": [{"toolUse": {"toolUseId": tid, "name": "browse_many", "input": {"urls": ["u"]}}}]}
+
+
+def _tool_result(tid, text):
+    return {"role": "user", "content": [{"toolResult": {"toolUseId": tid, "status": "success", "content": [{"text": text}]}}]}
+
+
+def _conversation():
+    return [
+        _user("first question " * 20),
+        _tool_use("a"),
+        _tool_result("a", "old page " * 200),
+        _assistant("first answer"),
+        _user("second question"),
+        _tool_use("b"),
+        _tool_result("b", "new page " * 200),
+    ]
+
+
+def _pairs_intact(messages):
+    uses = {b["toolUse"]["toolUseId"] for m in messages for b in m["content"] if "toolUse" in b}
+    results = {b["toolResult"]["toolUseId"] for m in messages for b in m["content"] if "toolResult" in b}
+    return uses == results
+
+
+def test_count_tokens_fallback_estimate():
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+    assert count_tokens(None) == 0
+
+
+def test_message_text_covers_tool_blocks():
+    text = strands_message_text(_tool_use("a")) + strands_message_text(_tool_result("a", "page body"))
+    assert "browse_many" in text and "page body" in text
+
+
+def test_counter_caches_by_identity():
+    counter = MessageTokenCounter()
+    message = _user("hello world")
+    first = counter.count(message)
+    message["content"][0]["text"] = "changed " * 100
+    assert counter.count(message) == first
+    assert counter.count(_user("changed " * 100)) > first
+
+
+def test_under_budget_is_untouched():
+    messages = _conversation()
+    counter = MessageTokenCounter()
+    total, trimmed = enforce_message_budget(messages, counter, 10_000)
+    assert trimmed == 0
+    assert total == counter.total(messages)
+    assert len(messages) == 7
+
+
+def test_truncate_drops_old_turns_and_keeps_pairs():
+    messages = _conversation()
+    counter = MessageTokenCounter()
+    budget = counter.total(messages[4:]) + 10
+    total, trimmed = enforce_message_budget(messages, counter, budget, extra_tokens=10)
+    assert trimmed == 4
+    assert total <= budget
+    assert messages[0]["content"][0]["text"] == "second question"
+    assert _pairs_intact(messages)
+
+
+def test_truncate_elides_current_turn_tool_output():
+    messages = _conversation()
+    counter = MessageTokenCounter()
+    total, trimmed = enforce_message_budget(messages, counter, 100)
+    assert total <= 100
+    assert messages[0]["content"][0]["text"] == "second question"
+    result = messages[-1]["content"][0]["toolResult"]
+    assert result["toolUseId"] == "b" and result["status"] == "success"
+    assert result["content"] == [{"text": ELIDED_TOOL_RESULT}]
+    assert _pairs_intact(messages)
+
+
+def test_truncate_never_drops_the_current_prompt():
+    messages = [_user("long prompt " * 500)]
+    total, trimmed = enforce_message_budget(messages, MessageTokenCounter(), 10)
+    assert trimmed == 0
+    assert len(messages) == 1
+    assert total > 10
+
+
+def test_error_and_warn_policies_leave_messages_alone(capsys):
+    messages = _conversation()
+    with pytest.raises(PromptLengthExceeded):
+        enforce_message_budget(messages, MessageTokenCounter(), 50, policy="error")
+    assert len(messages) == 7
+
+    total, trimmed = enforce_message_budget(messages, MessageTokenCounter(), 50, policy="warn")
+    assert trimmed == 0 and total > 50
+    assert "[PromptBudget]" in capsys.readouterr().out